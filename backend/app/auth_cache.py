@@ -0,0 +1,104 @@
+"""
+Auth Cache
+Local Supabase JWT verification plus a TTL+LRU cache of resolved user rows,
+so authenticated requests normally cost no network round trips
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from dotenv import load_dotenv
+from .supabase_client import run
+
+load_dotenv()
+
+# HS256 projects: the JWT secret from Project Settings -> API
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+# Asymmetric (RS256/ES256) projects: the JWKS endpoint, derived from SUPABASE_URL by default
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{os.getenv('SUPABASE_URL').rstrip('/')}/auth/v1/.well-known/jwks.json" if os.getenv("SUPABASE_URL") else None
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Asymmetric algorithms accepted from JWKS keys
+JWKS_ALGORITHMS = ("RS256", "ES256")
+
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "300"))  # seconds
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
+
+_jwks_client = None
+_users = OrderedDict()  # user id -> (expires_at, user row)
+_lock = threading.Lock()
+
+
+def _get_jwks_client():
+    global _jwks_client
+    if _jwks_client is None and SUPABASE_JWKS_URL:
+        _jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, lifespan=3600)
+    return _jwks_client
+
+
+async def verify_token(token: str):
+    """
+    Verify a Supabase access token locally and return its claims.
+
+    Returns None when no local key material is configured for the token's
+    algorithm, in which case the caller should fall back to auth.get_user.
+    Raises jwt.InvalidTokenError for bad signatures, expired tokens, etc.
+    """
+    # The header only picks the key; the accepted algorithm is pinned by the key itself
+    if jwt.get_unverified_header(token).get("alg") == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key, algorithms = SUPABASE_JWT_SECRET, ["HS256"]
+    else:
+        jwks_client = _get_jwks_client()
+        if not jwks_client:
+            return None
+        # A JWKS cache miss fetches the key set over HTTP (blocking urllib)
+        signing_key = await run(jwks_client.get_signing_key_from_jwt, token)
+        if signing_key.algorithm_name not in JWKS_ALGORITHMS:
+            raise jwt.InvalidAlgorithmError(f"Unsupported signing key algorithm {signing_key.algorithm_name}")
+        key, algorithms = signing_key.key, [signing_key.algorithm_name]
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["sub", "exp"]},
+    )
+
+
+def get_user(user_id: str):
+    """Returns the cached users row for user_id, or None on a miss"""
+    with _lock:
+        entry = _users.get(user_id)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del _users[user_id]
+            return None
+        _users.move_to_end(user_id)
+        return entry[1]
+
+
+def set_user(user_id: str, user: dict):
+    """Caches a users row, evicting the least recently used entries beyond the limit"""
+    with _lock:
+        _users[user_id] = (time.monotonic() + AUTH_CACHE_TTL, user)
+        _users.move_to_end(user_id)
+        while len(_users) > AUTH_CACHE_MAX_ENTRIES:
+            _users.popitem(last=False)
+
+
+def invalidate_user(user_id: str):
+    """Drops one cached user, e.g. after their role or company changes or they are deleted"""
+    with _lock:
+        _users.pop(user_id, None)
+
+
+def clear():
+    """Drops every cached user"""
+    with _lock:
+        _users.clear()
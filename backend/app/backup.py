@@ -0,0 +1,356 @@
+"""
+Incremental Backups
+Online, deduplicated backups of the SQLite database and the uploads
+directory. The database is copied with SQLite's backup API (the server keeps
+reading and writing meanwhile) and split into chunks; chunks and uploaded
+files are stored once each, gzip-compressed, under their SHA-256 in a
+content-addressed object store. A snapshot is a small JSON manifest, so a
+nightly run only writes what changed since the previous one.
+
+stream_archive() serves GET /backup: a zip of a database snapshot and the
+uploads, produced chunk by chunk.
+
+Layout of BACKUP_DIR:
+    objects/ab/abcdef...    gzip-compressed chunk or upload, named by the SHA-256 of its content
+    snapshots/<name>.json   manifest: database chunks and upload paths -> objects
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+# Database chunk size: a day of scattered row updates touches most 1 MB chunks but few 64 KB ones
+BACKUP_CHUNK_SIZE = int(os.getenv("BACKUP_CHUNK_SIZE", str(64 * 1024)))  # bytes
+# Pages copied per backup step; the database is unlocked between steps
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+# Chunks are small and most uploads are PDFs (already deflated): level 1 is nearly as small as 6 and much faster
+BACKUP_COMPRESS_LEVEL = int(os.getenv("BACKUP_COMPRESS_LEVEL", "1"))
+
+MANIFEST_VERSION = 1
+_READ_SIZE = 1024 * 1024
+
+
+def _object_path(backup_dir: str, digest: str) -> str:
+    return os.path.join(backup_dir, "objects", digest[:2], digest)
+
+
+def _snapshots_dir(backup_dir: str) -> str:
+    return os.path.join(backup_dir, "snapshots")
+
+
+def _write_atomic(path: str, write):
+    """Calls write(f) on a temp file next to path, then renames it into place"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _store_bytes(backup_dir: str, data: bytes, stats: dict) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(backup_dir, digest)
+    if os.path.exists(path):
+        stats["reused"] += 1
+        return digest
+    compressed = gzip.compress(data, compresslevel=BACKUP_COMPRESS_LEVEL, mtime=0)
+    _write_atomic(path, lambda f: f.write(compressed))
+    stats["objects_written"] += 1
+    stats["bytes_written"] += len(compressed)
+    return digest
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store_file(backup_dir: str, path: str, stats: dict) -> str:
+    digest = _sha256_file(path)
+    target = _object_path(backup_dir, digest)
+    if os.path.exists(target):
+        stats["reused"] += 1
+        return digest
+
+    def write(f):
+        with open(path, "rb") as src, gzip.GzipFile(fileobj=f, mode="wb", compresslevel=BACKUP_COMPRESS_LEVEL, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, _READ_SIZE)
+
+    _write_atomic(target, write)
+    stats["objects_written"] += 1
+    stats["bytes_written"] += os.path.getsize(target)
+    return digest
+
+
+def copy_database(db_path: str, dest_path: str, progress=None) -> int:
+    """
+    Consistent copy of a live SQLite database via the online backup API,
+    BACKUP_PAGES_PER_STEP pages at a time. progress(copied, total) is called
+    after each step. Returns the number of pages copied.
+    """
+    pages = {"total": 0}
+
+    def step(status, remaining, total):
+        pages["total"] = total
+        if progress:
+            progress(total - remaining, total)
+
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+    dest = sqlite3.connect(dest_path)
+    try:
+        # A step-wise backup restarts whenever another connection commits in between.
+        # Holding one read transaction pins the snapshot instead (in WAL mode writers carry on)
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(dest, pages=BACKUP_PAGES_PER_STEP, progress=step)
+        source.execute("COMMIT")
+    finally:
+        dest.close()
+        source.close()
+    return pages["total"]
+
+
+def snapshot_database(db_path: str) -> str:
+    """Consistent copy of a live database in a temp file; the caller removes it"""
+    fd, copy_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        copy_database(db_path, copy_path)
+    except BaseException:
+        os.unlink(copy_path)
+        raise
+    return copy_path
+
+
+class _Pipe:
+    """Unseekable file object that collects what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_archive(db_path: str, uploads_dir: str, db_name: str = "gemtracker.db"):
+    """
+    Yields a zip of a snapshot of db_path and of uploads_dir as it is written,
+    _READ_SIZE at a time, so neither the archive nor any one file is held in
+    memory. PDFs are stored as-is. The snapshot is taken on the first
+    iteration and deleted when the generator finishes or is closed, so a
+    response that is never sent leaves no temp file behind.
+    """
+    db_copy = snapshot_database(db_path)
+    entries = [(db_copy, db_name)]
+    pipe = _Pipe()
+    try:
+        if os.path.isdir(uploads_dir):
+            for root, _, files in os.walk(uploads_dir):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    entries.append((path, "uploads/" + os.path.relpath(path, uploads_dir).replace(os.sep, "/")))
+
+        with zipfile.ZipFile(pipe, "w", allowZip64=True) as archive:
+            for path, name in entries:
+                try:
+                    info = zipfile.ZipInfo.from_file(path, name)
+                    src = open(path, "rb")
+                except FileNotFoundError:  # upload deleted since the listing
+                    continue
+                info.compress_type = zipfile.ZIP_STORED if name.lower().endswith(".pdf") else zipfile.ZIP_DEFLATED
+                with src, archive.open(info, "w") as dest:
+                    for chunk in iter(lambda: src.read(_READ_SIZE), b""):
+                        dest.write(chunk)
+                        data = pipe.drain()
+                        if data:
+                            yield data
+                yield pipe.drain()
+        yield pipe.drain()  # central directory
+    finally:
+        os.unlink(db_copy)
+
+
+def list_snapshots(backup_dir: str = BACKUP_DIR) -> list:
+    """Snapshot names, oldest first"""
+    directory = _snapshots_dir(backup_dir)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def load_manifest(backup_dir: str = BACKUP_DIR, name: str = None) -> dict:
+    """A snapshot's manifest; the latest one when name is None. Raises FileNotFoundError"""
+    if name is None:
+        snapshots = list_snapshots(backup_dir)
+        if not snapshots:
+            raise FileNotFoundError(f"No snapshots in {backup_dir}")
+        name = snapshots[-1]
+    with open(os.path.join(_snapshots_dir(backup_dir), f"{name}.json")) as f:
+        return json.load(f)
+
+
+def create_snapshot(db_path: str, uploads_dir: str, backup_dir: str = BACKUP_DIR, progress=None) -> dict:
+    """
+    Backs up the database and uploads into backup_dir and returns the new
+    manifest. Uploads whose size and mtime match the previous snapshot are
+    not re-read; everything else is hashed and stored only if its content is new.
+    """
+    stats = {"objects_written": 0, "bytes_written": 0, "reused": 0}
+    try:
+        previous = load_manifest(backup_dir)["uploads"]
+    except FileNotFoundError:
+        previous = {}
+
+    manifest = {"version": MANIFEST_VERSION, "created_at": datetime.now().isoformat(timespec="seconds")}
+
+    if os.path.exists(db_path):
+        os.makedirs(backup_dir, exist_ok=True)
+        fd, copy_path = tempfile.mkstemp(dir=backup_dir, suffix=".db.tmp")
+        os.close(fd)
+        try:
+            pages = copy_database(db_path, copy_path, progress)
+            chunks = []
+            with open(copy_path, "rb") as f:
+                for chunk in iter(lambda: f.read(BACKUP_CHUNK_SIZE), b""):
+                    chunks.append(_store_bytes(backup_dir, chunk, stats))
+            manifest["database"] = {
+                "name": os.path.basename(db_path),
+                "size": os.path.getsize(copy_path),
+                "pages": pages,
+                "chunks": chunks,
+            }
+        finally:
+            os.unlink(copy_path)
+    else:
+        print(f"Warning: Database file not found at {db_path}")
+        manifest["database"] = None
+
+    uploads = {}
+    if os.path.isdir(uploads_dir):
+        for root, _, files in os.walk(uploads_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, uploads_dir).replace(os.sep, "/")
+                st = os.stat(path)
+                entry = previous.get(name)
+                if (
+                    entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                    and os.path.exists(_object_path(backup_dir, entry["sha256"]))
+                ):
+                    stats["reused"] += 1
+                    uploads[name] = entry
+                    continue
+                uploads[name] = {"sha256": _store_file(backup_dir, path, stats), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    else:
+        print(f"Warning: Uploads directory not found at {uploads_dir}")
+    manifest["uploads"] = uploads
+    manifest["stats"] = stats
+
+    name = datetime.now().strftime("%Y%m%d_%H%M%S")
+    existing = set(list_snapshots(backup_dir))
+    suffix = 1
+    while name in existing:
+        suffix += 1
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}"
+    manifest["name"] = name
+    body = json.dumps(manifest, indent=1).encode()
+    _write_atomic(os.path.join(_snapshots_dir(backup_dir), f"{name}.json"), lambda f: f.write(body))
+    return manifest
+
+
+def _read_object(backup_dir: str, digest: str) -> bytes:
+    with gzip.open(_object_path(backup_dir, digest), "rb") as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Backup object {digest} is corrupt")
+    return data
+
+
+def restore(target_dir: str, backup_dir: str = BACKUP_DIR, name: str = None, force: bool = False) -> dict:
+    """
+    Restores a snapshot (the latest when name is None) into target_dir: the
+    database file and an uploads/ directory. Refuses to replace an existing
+    database unless force is set. Every object is checked against its hash.
+    """
+    manifest = load_manifest(backup_dir, name)
+    os.makedirs(target_dir, exist_ok=True)
+
+    database = manifest["database"]
+    if database:
+        db_path = os.path.join(target_dir, database["name"])
+        if os.path.exists(db_path) and not force:
+            raise FileExistsError(f"{db_path} already exists")
+
+        def write(f):
+            for digest in database["chunks"]:
+                f.write(_read_object(backup_dir, digest))
+
+        _write_atomic(db_path, write)
+        # A leftover WAL would be replayed on top of the restored file
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    uploads_dir = os.path.join(target_dir, "uploads")
+    for path, entry in manifest["uploads"].items():
+        target = os.path.join(uploads_dir, *path.split("/"))
+        if os.path.exists(target):
+            if _sha256_file(target) == entry["sha256"]:
+                continue
+            if not force:
+                raise FileExistsError(f"{target} already exists")
+        data = _read_object(backup_dir, entry["sha256"])
+        _write_atomic(target, lambda f: f.write(data))
+    return manifest
+
+
+def prune(keep: int, backup_dir: str = BACKUP_DIR) -> dict:
+    """Deletes all but the newest keep snapshots and any objects no remaining snapshot uses"""
+    snapshots = list_snapshots(backup_dir)
+    removed = {"snapshots": 0, "objects": 0, "bytes": 0}
+    for name in snapshots[:max(len(snapshots) - keep, 0)]:
+        os.unlink(os.path.join(_snapshots_dir(backup_dir), f"{name}.json"))
+        removed["snapshots"] += 1
+
+    referenced = set()
+    for name in list_snapshots(backup_dir):
+        manifest = load_manifest(backup_dir, name)
+        if manifest["database"]:
+            referenced.update(manifest["database"]["chunks"])
+        referenced.update(entry["sha256"] for entry in manifest["uploads"].values())
+
+    objects_dir = os.path.join(backup_dir, "objects")
+    if os.path.isdir(objects_dir):
+        for root, _, files in os.walk(objects_dir):
+            for digest in files:
+                if digest not in referenced:
+                    path = os.path.join(root, digest)
+                    removed["bytes"] += os.path.getsize(path)
+                    os.unlink(path)
+                    removed["objects"] += 1
+    return removed
@@ -1,14 +1,88 @@
-from sqlalchemy import create_engine
+"""
+Database Engine
+SQLAlchemy engine for the self-hosted backend. DATABASE_URL selects the
+database: SQLite (the default ./gemtracker.db) is tuned on every new
+connection (WAL, synchronous=NORMAL, mmap, busy timeout), Postgres gets a
+sized connection pool with pre-ping and recycling
+"""
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
 import os
 
+load_dotenv()
+
 # SQLite fallback
-SQLALCHEMY_DATABASE_URL = "sqlite:///./gemtracker.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gemtracker.db")
+if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
+    # Heroku/Render style URLs; SQLAlchemy only knows the postgresql:// scheme
+    SQLALCHEMY_DATABASE_URL = "postgresql://" + SQLALCHEMY_DATABASE_URL[len("postgres://"):]
+
+# WAL lets readers run alongside the single writer; NORMAL only fsyncs at checkpoints
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms a writer waits for the lock
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # pages, or KiB when negative
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))  # prepared statements per connection
+
+# Sized for FastAPI's sync endpoint thread pool (40 threads)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+# SQLAlchemy's cache of compiled SQL per statement shape
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1000"))
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+        cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+    finally:
+        cursor.close()
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """Engine with the connection profile for url's database"""
+    if url.startswith("sqlite"):
+        # In-memory databases live in one connection; only files get a pool
+        pool = {} if url in ("sqlite://", "sqlite:///:memory:") else {
+            "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT,
+        }
+        engine = create_engine(
+            url,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT / 1000,
+                "cached_statements": SQLITE_STATEMENT_CACHE,
+            },
+            query_cache_size=DB_QUERY_CACHE_SIZE,
+            **pool
+        )
+        event.listen(engine, "connect", _tune_sqlite)
+        return engine
+
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        # Drop connections the server or a proxy may have closed
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+    )
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = make_engine()
+IS_SQLITE = engine.dialect.name == "sqlite"
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
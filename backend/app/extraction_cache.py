@@ -0,0 +1,124 @@
+"""
+Extraction Cache
+Content-addressed cache of extracted PDF details, keyed by the SHA-256
+of the uploaded bytes, so re-uploads of the same bid skip parsing and Gemini
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from . import extractor
+
+load_dotenv()
+
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "./extraction_cache.db")
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(30 * 24 * 3600)))  # seconds
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+
+_initialized = False
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(EXTRACTION_CACHE_PATH, timeout=10)
+    if not _initialized:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                digest TEXT PRIMARY KEY,
+                details TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_accessed_at ON extraction_cache(accessed_at)")
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 digest of a file on disk"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get(digest: str):
+    """Returns the cached details dict for a digest, or None on a miss/expired entry"""
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT details, created_at FROM extraction_cache WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not row:
+                return None
+            if now - row[1] > EXTRACTION_CACHE_TTL:
+                conn.execute("DELETE FROM extraction_cache WHERE digest = ?", (digest,))
+                conn.commit()
+                return None
+            details = json.loads(row[0], object_hook=_decode)
+            if not all(field in details for field in extractor.FIELDS):
+                # Cached before the extractor learned a field; re-parse so it gets filled
+                return None
+            # Older entries also carried the search text, which is now read at indexing time
+            details.pop("page_text", None)
+            conn.execute("UPDATE extraction_cache SET accessed_at = ? WHERE digest = ?", (now, digest))
+            conn.commit()
+            return details
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"DEBUG: Extraction cache read failed: {e}")
+        return None
+
+
+def put(digest: str, details: dict):
+    """Stores details for a digest, evicting expired and least recently used entries"""
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (digest, details, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (digest, json.dumps(details, default=_encode), now, now)
+            )
+            conn.execute("DELETE FROM extraction_cache WHERE created_at < ?", (now - EXTRACTION_CACHE_TTL,))
+            conn.execute("""
+                DELETE FROM extraction_cache WHERE digest IN (
+                    SELECT digest FROM extraction_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (EXTRACTION_CACHE_MAX_ENTRIES,))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"DEBUG: Extraction cache write failed: {e}")
+
+
+def clear():
+    """Drops every cached entry"""
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM extraction_cache")
+        conn.commit()
+    finally:
+        conn.close()
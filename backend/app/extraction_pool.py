@@ -0,0 +1,158 @@
+"""
+PDF Extraction Pool
+Runs the regex scan in worker processes so bulk uploads do not block the
+event loop while pdfplumber parses each file; the Gemini fallback runs
+afterwards in the API process so a batch can share one rate-limited client
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from . import utils, extraction_cache, gemini
+
+load_dotenv()
+
+# Number of worker processes and per-file parse budget (seconds)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "60"))
+
+_executor = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Returns the shared process pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        # spawn, not fork: by the first upload the API process already runs
+        # thread pools, and a forked child can inherit a lock held by one
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown():
+    """Stops the worker processes (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# extract_many error for files whose Gemini fallback would exceed the rate budget
+AI_PENDING = "Waiting for the AI fallback"
+
+
+def _needs_ai(details: dict) -> bool:
+    return not details["bid_number"] and gemini.is_enabled()
+
+
+async def _cached(digest: str):
+    # sqlite3 calls run off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, extraction_cache.get, digest)
+
+
+async def _finish(details: dict, pdf_source, filename: str, digest: str):
+    # Cache what the PDF itself yielded, before the filename fallback: the same
+    # bytes uploaded under another name must not inherit a filename bid number
+    if details.get("bid_number"):
+        await asyncio.get_running_loop().run_in_executor(None, extraction_cache.put, digest, dict(details))
+    return utils.finish_details(details, pdf_source, filename)
+
+
+async def _parse(pdf_source, timeout: float = None):
+    """Regex scan in the pool; returns (details, text) with the AI fallback still to do"""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_executor(), utils.parse_pdf_details, pdf_source)
+    return await asyncio.wait_for(future, timeout or PDF_TIMEOUT)
+
+
+async def read_page_text(pdf_source, timeout: float = None) -> str:
+    """Search-index text of a PDF, read in the pool (only the indexing code calls this)"""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_executor(), utils.read_page_text, pdf_source)
+    return await asyncio.wait_for(future, timeout or PDF_TIMEOUT)
+
+
+async def extract(pdf_source, timeout: float = None, digest: str = None, filename: str = None):
+    """
+    Extract details for a single PDF (path or bytes) in the pool without blocking the event loop.
+    The content-hash cache is consulted first, so re-uploads skip parsing entirely.
+    """
+    if digest is None:
+        if isinstance(pdf_source, (bytes, bytearray)):
+            digest = hashlib.sha256(pdf_source).hexdigest()
+        else:
+            digest = await asyncio.get_running_loop().run_in_executor(None, extraction_cache.sha256_file, pdf_source)
+    cached = await _cached(digest)
+    if cached:
+        print(f"DEBUG: Extraction cache hit for {filename or digest}")
+        return utils.finish_details(cached, pdf_source, filename)
+
+    details, text = await _parse(pdf_source, timeout)
+    if _needs_ai(details):
+        print("DEBUG: Regex missed Bid Number. Attempting AI extraction with Gemini...")
+        ai_data, = await gemini.extract_fields_batch([text])
+        gemini.apply_fields(details, ai_data)
+    return await _finish(details, pdf_source, filename, digest)
+
+
+async def extract_many(uploads: list, timeout: float = None):
+    """
+    Fan a batch of ingest.IngestedUpload objects across the pool and yield
+    (upload, details, error) tuples in completion order.
+
+    At most PDF_WORKERS files are in flight at once so the per-file timeout
+    measures parse time rather than time spent queued behind other files.
+    A timed-out parse cannot be interrupted inside its worker; the file is
+    reported as failed and the worker is reused once it finishes.
+
+    Files the regex scan could not read are held back and sent to Gemini
+    together once every file has been parsed, then yielded last. Those the
+    rate limit cannot serve within gemini.GEMINI_INLINE_BUDGET are yielded
+    with the AI_PENDING error instead, for the caller to queue or report.
+    """
+    semaphore = asyncio.Semaphore(PDF_WORKERS)
+
+    async def run(upload):
+        cached = await _cached(upload.sha256)
+        if cached:
+            print(f"DEBUG: Extraction cache hit for {upload.filename or upload.sha256}")
+            return upload, utils.finish_details(cached, upload.source, upload.filename), None, None
+        async with semaphore:
+            try:
+                details, text = await _parse(upload.source, timeout)
+                return upload, details, text, None
+            except asyncio.TimeoutError:
+                return upload, None, None, f"Timed out after {timeout or PDF_TIMEOUT:g}s"
+            except Exception as e:
+                return upload, None, None, str(e)
+
+    deferred = []
+    tasks = [asyncio.ensure_future(run(upload)) for upload in uploads]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            upload, details, text, error = await next_done
+            if error or text is None:
+                yield upload, details, error
+            elif _needs_ai(details):
+                deferred.append((upload, details, text))
+            else:
+                yield upload, await _finish(details, upload.source, upload.filename, upload.sha256), None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if deferred:
+        fits = gemini.fits_budget([text for _, _, text in deferred])
+        for (upload, details, _), fit in zip(deferred, fits):
+            if not fit:
+                yield upload, details, AI_PENDING
+        deferred = [entry for entry, fit in zip(deferred, fits) if fit]
+
+    if deferred:
+        print(f"DEBUG: Regex missed Bid Number in {len(deferred)} files. Attempting AI extraction with Gemini...")
+        ai_results = await gemini.extract_fields_batch([text for _, _, text in deferred])
+        for (upload, details, _), ai_data in zip(deferred, ai_results):
+            gemini.apply_fields(details, ai_data)
+            yield upload, await _finish(details, upload.source, upload.filename, upload.sha256), None
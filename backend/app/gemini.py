@@ -0,0 +1,213 @@
+"""
+Gemini Fallback
+AI extraction for PDFs whose header the regex scan could not read. The model
+is configured once and reused, requests are rate limited across every process
+(the limit is booked in the jobs database), and responses are cached by a hash
+of the prompt text so re-sent texts cost nothing
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import google.generativeai as genai
+from dotenv import load_dotenv
+from . import jobs
+
+load_dotenv()
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "15"))
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "1024"))
+# How long a request may wait on the rate limit for a batch (seconds); texts
+# that would start later are left to the caller (job queue / pending)
+GEMINI_INLINE_BUDGET = float(os.getenv("GEMINI_INLINE_BUDGET", "20"))
+PROMPT_TEXT_LIMIT = 5000
+
+_model = None
+_model_key = None  # API key the current model was configured with; None for an injected model
+_injected = False
+_responses = OrderedDict()  # prompt hash -> parsed response
+_lock = threading.Lock()
+RATE_LIMIT = "gemini"
+
+
+def set_model(model):
+    """
+    Use the given model instead of a configured Gemini model (anything with a
+    generate_content(prompt) method returning an object with .text).
+    Passing None goes back to the real model.
+    """
+    global _model, _model_key, _injected
+    with _lock:
+        _model = model
+        _model_key = None
+        _injected = model is not None
+        _responses.clear()
+
+
+def is_enabled() -> bool:
+    return _injected or bool(os.getenv("GOOGLE_API_KEY"))
+
+
+def get_model():
+    """Returns the shared model, configuring the client only when the API key changes"""
+    global _model, _model_key
+    if _injected:
+        return _model
+    api_key = os.getenv("GOOGLE_API_KEY")
+    with _lock:
+        if _model is None or _model_key != api_key:
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(GEMINI_MODEL)
+            _model_key = api_key
+        return _model
+
+
+def build_prompt(text: str) -> str:
+    return f"""
+            Extract GeM Bid Number, End Date (DD-MM-YYYY HH:MM:SS), and Item Category.
+            Return ONLY clean JSON.
+            Text: {text[:PROMPT_TEXT_LIMIT]}
+            """
+
+
+def parse_response(response_text: str) -> dict:
+    json_text = response_text.replace('```json', '').replace('```', '').strip()
+    return json.loads(json_text)
+
+
+def _reserve_slot() -> float:
+    """
+    Books the next request slot under the per-minute limit and returns how long
+    to wait for it. The API key's quota is shared by the API process, its PDF
+    workers and the job workers, so the slot is booked in the jobs database.
+    """
+    if GEMINI_REQUESTS_PER_MINUTE <= 0:
+        return 0.0
+    return jobs.reserve_slot(RATE_LIMIT, 60.0 / GEMINI_REQUESTS_PER_MINUTE)
+
+
+def _cache_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def fits_budget(texts: list, budget: float = None) -> list:
+    """
+    Which texts extract_fields_batch can answer within budget seconds
+    (default GEMINI_INLINE_BUDGET): cached texts always, new ones while the
+    rate limit has slots starting in time. One bool per text, in order.
+    """
+    budget = GEMINI_INLINE_BUDGET if budget is None else budget
+    if GEMINI_REQUESTS_PER_MINUTE <= 0:
+        return [True] * len(texts)
+    interval = 60.0 / GEMINI_REQUESTS_PER_MINUTE
+    wait = jobs.slot_wait(RATE_LIMIT)
+    slots = int((budget - wait) // interval) + 1 if budget >= wait else 0
+
+    fits, sending = [], set()
+    for text in texts:
+        key = _cache_key(build_prompt(text))
+        if _cache_get(key) is not None or key in sending:
+            fits.append(True)
+        elif len(sending) < slots:
+            sending.add(key)
+            fits.append(True)
+        else:
+            fits.append(False)
+    return fits
+
+
+def _cache_get(key: str):
+    with _lock:
+        data = _responses.get(key)
+        if data is not None:
+            _responses.move_to_end(key)
+        return data
+
+
+def _cache_put(key: str, data: dict):
+    with _lock:
+        _responses[key] = data
+        _responses.move_to_end(key)
+        while len(_responses) > GEMINI_CACHE_MAX_ENTRIES:
+            _responses.popitem(last=False)
+
+
+def _generate(prompt: str) -> dict:
+    response = get_model().generate_content(prompt)
+    return parse_response(response.text)
+
+
+def extract_fields(text: str):
+    """Ask Gemini for the header fields of one text; returns the parsed JSON dict or None"""
+    if not is_enabled():
+        return None
+    prompt = build_prompt(text)
+    key = _cache_key(prompt)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    try:
+        time.sleep(_reserve_slot())
+        data = _generate(prompt)
+    except Exception as e:
+        print(f"DEBUG: AI fallback failed: {e}")
+        return None
+    _cache_put(key, data)
+    return data
+
+
+async def extract_fields_batch(texts: list) -> list:
+    """
+    Ask Gemini for the header fields of many texts at once. Identical texts are
+    sent once, up to GEMINI_MAX_CONCURRENCY requests run in parallel, and starts
+    are spaced to stay under GEMINI_REQUESTS_PER_MINUTE. Returns one dict (or
+    None on failure) per input text, in input order.
+    """
+    if not is_enabled():
+        return [None] * len(texts)
+
+    prompts = [build_prompt(text) for text in texts]
+    keys = [_cache_key(prompt) for prompt in prompts]
+    results = {key: _cache_get(key) for key in keys}
+    pending = {key: prompt for key, prompt in zip(keys, prompts) if results[key] is None}
+    if pending:
+        print(f"DEBUG: Sending {len(pending)} texts to Gemini ({len(keys) - len(pending)} cached)")
+    semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+    async def send(key, prompt):
+        async with semaphore:
+            await asyncio.sleep(await asyncio.to_thread(_reserve_slot))
+            try:
+                data = await asyncio.to_thread(_generate, prompt)
+            except Exception as e:
+                print(f"DEBUG: AI fallback failed: {e}")
+                return
+            _cache_put(key, data)
+            results[key] = data
+
+    await asyncio.gather(*(send(key, prompt) for key, prompt in pending.items()))
+    return [results[key] for key in keys]
+
+
+def apply_fields(details: dict, ai_data: dict):
+    """Fill the fields the regex scan missed from a Gemini response"""
+    if not ai_data:
+        return
+    if not details["bid_number"]: details["bid_number"] = ai_data.get("bid_number")
+    if not details["item_category"]: details["item_category"] = ai_data.get("item_category")
+    if not details["bid_end_date"] and ai_data.get("bid_end_date"):
+        try:
+            details["bid_end_date"] = datetime.strptime(ai_data["bid_end_date"], "%d-%m-%Y %H:%M:%S")
+        except:
+            pass
+
+
+def clear_cache():
+    with _lock:
+        _responses.clear()
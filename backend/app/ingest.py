@@ -0,0 +1,130 @@
+"""
+Upload Ingestion
+Reads each UploadFile exactly once, hashing it on the fly, so the same bytes
+feed parsing, the extraction cache and storage without temp-file round trips
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Uploads up to this size stay in memory; larger ones spill to one temp file
+INGEST_SPOOL_MAX = int(os.getenv("INGEST_SPOOL_MAX", str(16 * 1024 * 1024)))
+# Same for each file of a bulk upload, which holds the whole batch until it is
+# parsed: by default every file goes to disk and the workers get paths
+INGEST_BULK_SPOOL_MAX = int(os.getenv("INGEST_BULK_SPOOL_MAX", "0"))
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+# Bid data sheet fields stored in their own tenders columns (besides bid_number/bid_end_date/item_category/subject)
+DETAIL_COLUMNS = (
+    "bid_opening_date", "ministry", "department", "buyer_organisation", "quantity",
+    "emd_amount", "epbg_percentage", "estimated_value", "contract_period", "consignee_locations",
+)
+# VARCHAR lengths of the free-text detail columns (add_bid_details.sql). The
+# extractor keeps the rest of the header line, which can run past them and
+# would fail the whole insert
+DETAIL_MAX_LENGTHS = {"ministry": 255, "department": 255, "buyer_organisation": 255, "contract_period": 100}
+
+
+class IngestedUpload:
+    """A fully read upload: bytes in memory, or a temp file path once it outgrows the spool"""
+
+    def __init__(self, filename: str, data: bytes = None, path: str = None, size: int = 0, sha256: str = None):
+        self.filename = filename
+        self.data = data
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self._owns_path = path is not None
+
+    @property
+    def source(self):
+        """What to hand to utils.extract_pdf_details / storage upload: bytes or a file path"""
+        return self.data if self.data is not None else self.path
+
+    def save_to(self, dest_path: str):
+        """Persist the upload at dest_path (one write for in-memory data, a move for spilled files)"""
+        if self.data is not None:
+            with open(dest_path, "wb") as f:
+                f.write(self.data)
+        else:
+            shutil.move(self.path, dest_path)
+            self.path = dest_path
+            self._owns_path = False
+
+    def close(self):
+        """Drop the buffer and any spilled temp file (files moved by save_to are kept)"""
+        if self._owns_path and os.path.exists(self.path):
+            os.remove(self.path)
+            self._owns_path = False
+        self.data = None
+
+
+async def read_upload(file, spool_max: int = None) -> IngestedUpload:
+    """Read an UploadFile once into memory (or a temp file past spool_max/INGEST_SPOOL_MAX), hashing as it goes"""
+    spool_max = INGEST_SPOOL_MAX if spool_max is None else spool_max
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    spill = None
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(INGEST_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            if spill is None and size > spool_max:
+                spill = tempfile.NamedTemporaryFile(prefix="ingest_", suffix=".pdf", delete=False)
+                spill.write(buffer)
+                buffer = None
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                buffer.extend(chunk)
+    except Exception:
+        if spill is not None:
+            spill.close()
+            os.remove(spill.name)
+        raise
+
+    if spill is not None:
+        spill.close()
+        return IngestedUpload(file.filename, path=spill.name, size=size, sha256=digest.hexdigest())
+    return IngestedUpload(file.filename, data=bytes(buffer), size=size, sha256=digest.hexdigest())
+
+
+def build_tender_record(details: dict, user: dict, storage_path: str) -> dict:
+    """The tenders row inserted into Supabase for freshly extracted details"""
+    # Determine status based on end date
+    status = "active"
+    bid_end_date = details.get("bid_end_date")
+    if isinstance(bid_end_date, datetime) and bid_end_date < datetime.utcnow():
+        status = "expired"
+
+    record = {
+        "company_id": user["company_id"],
+        "uploaded_by": user["id"],
+        "bid_number": details["bid_number"],
+        "bid_end_date": bid_end_date.isoformat() if bid_end_date else None,
+        "item_category": details.get("item_category"),
+        "subject": details.get("subject"),
+        "file_path": storage_path,
+        "status": status
+    }
+    # Only the detail columns that have a value, so projects that have not run
+    # add_bid_details.sql yet keep accepting uploads
+    for column in DETAIL_COLUMNS:
+        value = details.get(column)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif column in DETAIL_MAX_LENGTHS:
+            value = value[:DETAIL_MAX_LENGTHS[column]].rstrip()
+        record[column] = value
+    return record
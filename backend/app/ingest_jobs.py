@@ -0,0 +1,89 @@
+"""
+Ingestion Jobs
+Worker-side handlers for background tender uploads: parse (with cache and
+Gemini fallback), push the PDF to Supabase Storage and insert the tender;
+then index the PDF text for search
+"""
+import os
+import uuid
+from datetime import datetime
+from . import jobs, utils, extraction_cache, ingest
+
+JOBS_SPOOL_DIR = os.getenv("JOBS_SPOOL_DIR", os.path.join("uploads", "jobs"))
+
+
+def spool_upload(upload: ingest.IngestedUpload) -> str:
+    """Moves an ingested upload into the spool directory the workers read from"""
+    os.makedirs(JOBS_SPOOL_DIR, exist_ok=True)
+    spool_path = os.path.abspath(os.path.join(JOBS_SPOOL_DIR, f"{uuid.uuid4().hex}_{upload.sha256}.pdf"))
+    upload.save_to(spool_path)
+    return spool_path
+
+
+def _store_page_text(client, tender_id: str, pdf_source):
+    """Writes the PDF text into the tender's search row (created by the tenders insert trigger)"""
+    page_text = utils.read_page_text(pdf_source)
+    if page_text:
+        client.table("tender_search").update({"content": page_text}).eq("tender_id", tender_id).execute()
+
+
+@jobs.handler("tender_index")
+def run_tender_index(job, report):
+    from .supabase_client import get_supabase_client
+
+    payload = job["payload"]
+    client = get_supabase_client()
+    report("downloading", 10)
+    pdf_bytes = client.storage.from_('tender-pdfs').download(payload["file_path"])
+    report("indexing", 50)
+    _store_page_text(client, payload["tender_id"], pdf_bytes)
+    return {"tender_id": payload["tender_id"]}
+
+
+@jobs.handler("tender_upload")
+def run_tender_upload(job, report):
+    from .supabase_client import get_supabase_client
+
+    payload = job["payload"]
+    spool_path = payload["spool_path"]
+    user = payload["user"]
+    try:
+        report("parsing", 10)
+        details = extraction_cache.get(payload["sha256"])
+        if not details:
+            details = utils.extract_pdf_details(spool_path, finish=False)
+            # Cached before the filename fallback, which depends on this upload's name
+            if details.get("bid_number"):
+                extraction_cache.put(payload["sha256"], dict(details))
+        details = utils.finish_details(details, spool_path, payload["filename"])
+        if not details.get("bid_number"):
+            raise ValueError("Could not extract bid number from PDF. Please check if the document contains a valid GeM Bid Number.")
+
+        report("uploading", 50)
+        client = get_supabase_client()
+        storage_path = f"{user['company_id']}/{details['bid_number']}_{int(datetime.now().timestamp())}.pdf"
+        with open(spool_path, "rb") as f:
+            client.storage.from_('tender-pdfs').upload(
+                storage_path,
+                f,
+                file_options={"content-type": "application/pdf"}
+            )
+
+        report("saving", 80)
+        tender_data = ingest.build_tender_record(details, user, storage_path)
+        response = client.table("tenders").insert(tender_data).execute()
+        if not response.data:
+            raise RuntimeError("Failed to create tender record")
+        tender = response.data[0]
+        if utils.SEARCH_MAX_PAGES > 0:
+            report("indexing", 90)
+            try:
+                _store_page_text(client, tender["id"], spool_path)
+            except Exception as e:
+                # The tender is saved either way; it just stays searchable by its fields only
+                print(f"DEBUG: Failed to index PDF text for {tender['bid_number']}: {e}")
+        return {"tender": tender}
+    finally:
+        # A worker that dies mid-job never gets here, so a requeued job still finds its file
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
@@ -0,0 +1,327 @@
+"""
+Background Jobs
+SQLite-backed job queue with worker processes, used to take heavy ingestion
+work (parsing, Gemini fallback, storage upload, DB insert) off the request path
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "./jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))  # seconds
+# Workers touch their running job this often; a job whose heartbeat is older
+# than JOB_HEARTBEAT_TIMEOUT (or whose worker on this host has exited) is requeued
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+
+FINISHED_STATUSES = ("done", "failed")
+
+# kind -> handler(job, report); populated by @handler in the modules passed to start_workers
+_handlers = {}
+_workers = []
+_stop_event = None
+
+
+def handler(kind: str):
+    """Registers the function that runs jobs of the given kind inside a worker"""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _connect():
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    conn = _connect()
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                owner TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                stage TEXT,
+                progress INTEGER NOT NULL DEFAULT 0,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                worker TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        # Job databases created before heartbeats existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("worker", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs(status, created_at)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _to_dict(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def enqueue(kind: str, payload: dict, owner: str = None) -> str:
+    """Queues a job and returns its id"""
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, owner, status, stage, payload, created_at, updated_at) VALUES (?, ?, ?, 'queued', 'queued', ?, ?, ?)",
+            (job_id, kind, owner, json.dumps(payload), now, now)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return job_id
+
+
+def get(job_id: str):
+    """Returns the job as a dict, or None"""
+    conn = _connect()
+    try:
+        return _to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    finally:
+        conn.close()
+
+
+def update(job_id: str, **fields):
+    fields["updated_at"] = time.time()
+    for key in ("payload", "result"):
+        if key in fields and fields[key] is not None:
+            fields[key] = json.dumps(fields[key])
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+    conn = _connect()
+    try:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _rate_limits():
+    # Created on first use: the SQLite-mode API uses the limiter without a job queue
+    conn = _connect()
+    conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, next_slot REAL NOT NULL)")
+    return conn
+
+
+def reserve_slot(name: str, interval: float) -> float:
+    """
+    Books the next start slot of a rate limit (one start per interval seconds)
+    shared by every process on this jobs database: the API, its extraction
+    pool and the job workers. Returns how long to wait for the slot.
+    """
+    conn = _rate_limits()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT next_slot FROM rate_limits WHERE name = ?", (name,)).fetchone()
+        now = time.time()
+        slot = max(now, row["next_slot"]) if row else now
+        conn.execute(
+            "INSERT INTO rate_limits (name, next_slot) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET next_slot = excluded.next_slot",
+            (name, slot + interval)
+        )
+        conn.commit()
+        return slot - now
+    finally:
+        conn.close()
+
+
+def slot_wait(name: str) -> float:
+    """Seconds until the next free slot of a rate limit (0 if one is free now)"""
+    conn = _rate_limits()
+    try:
+        row = conn.execute("SELECT next_slot FROM rate_limits WHERE name = ?", (name,)).fetchone()
+    finally:
+        conn.close()
+    return max(row["next_slot"] - time.time(), 0.0) if row else 0.0
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def claim():
+    """Atomically moves the oldest queued job to running under this process and returns it"""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'running', stage = 'started', updated_at = ?, worker = ?, heartbeat_at = ? WHERE id = ?",
+            (now, _worker_id(), now, row["id"])
+        )
+        conn.commit()
+        return _to_dict(row)
+    finally:
+        conn.close()
+
+
+def heartbeat(job_id: str):
+    """Marks a running job as still owned by a live worker"""
+    conn = _connect()
+    try:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def requeue_interrupted() -> int:
+    """
+    Puts running jobs whose worker is gone back in the queue: the worker was
+    on this host and its process has exited, or its heartbeat is stale. Jobs
+    of live workers in other processes (or on other hosts) are left alone.
+    """
+    host = socket.gethostname()
+    stale = time.time() - JOB_HEARTBEAT_TIMEOUT
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        orphaned = []
+        for row in conn.execute("SELECT id, worker, heartbeat_at FROM jobs WHERE status = 'running'"):
+            worker_host, _, pid = (row["worker"] or "").rpartition(":")
+            if row["heartbeat_at"] is None or row["heartbeat_at"] < stale:
+                orphaned.append(row["id"])
+            elif worker_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                orphaned.append(row["id"])
+        conn.executemany(
+            "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, worker = NULL, heartbeat_at = NULL "
+            "WHERE id = ? AND status = 'running'",
+            [(job_id,) for job_id in orphaned]
+        )
+        conn.commit()
+        return len(orphaned)
+    finally:
+        conn.close()
+
+
+def run_job(job):
+    """Runs one claimed job with its registered handler, recording progress and outcome"""
+    def report(stage: str, progress: int):
+        update(job["id"], stage=stage, progress=progress)
+
+    fn = _handlers.get(job["kind"])
+    if fn is None:
+        update(job["id"], status="failed", stage="failed", error=f"No handler for job kind '{job['kind']}'")
+        return
+    try:
+        result = fn(job, report)
+        update(job["id"], status="done", stage="done", progress=100, result=result)
+    except Exception as e:
+        print(f"DEBUG: Job {job['id']} failed: {e}")
+        traceback.print_exc()
+        update(job["id"], status="failed", stage="failed", error=str(e))
+
+
+def _run_with_heartbeat(job):
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(JOB_HEARTBEAT_INTERVAL):
+            try:
+                heartbeat(job["id"])
+            except Exception as e:
+                print(f"DEBUG: Heartbeat for job {job['id']} failed: {e}")
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        run_job(job)
+    finally:
+        done.set()
+        thread.join()
+
+
+def worker_main(handler_modules: list, stop_event):
+    """Worker process loop: import the handlers, then claim and run jobs until stopped"""
+    for module in handler_modules:
+        importlib.import_module(module)
+    requeue_checked = 0
+    while not stop_event.is_set():
+        # Recover jobs of workers that died while this one keeps running
+        if time.monotonic() - requeue_checked > JOB_HEARTBEAT_INTERVAL:
+            requeue_checked = time.monotonic()
+            try:
+                requeue_interrupted()
+            except Exception as e:
+                print(f"DEBUG: Requeueing interrupted jobs failed: {e}")
+        job = claim()
+        if job is None:
+            stop_event.wait(JOB_POLL_INTERVAL)
+            continue
+        _run_with_heartbeat(job)
+
+
+def start_workers(handler_modules: list, count: int = None):
+    """Starts the worker processes (called on application startup)"""
+    global _stop_event
+    count = JOB_WORKERS if count is None else count
+    init_db()
+    requeue_interrupted()
+    if count <= 0:
+        return
+    # spawn, not fork: the API process already runs thread pools
+    context = multiprocessing.get_context("spawn")
+    _stop_event = context.Event()
+    for i in range(count):
+        process = context.Process(
+            target=worker_main, args=(handler_modules, _stop_event), name=f"job-worker-{i}", daemon=True
+        )
+        process.start()
+        _workers.append(process)
+    print(f"DEBUG: Started {count} job workers")
+
+
+def stop_workers(timeout: float = 10):
+    """Signals the workers to finish their current job and exit"""
+    if _stop_event is not None:
+        _stop_event.set()
+    for process in _workers:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+    _workers.clear()
@@ -1,19 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request, BackgroundTasks
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List
-import shutil
+from sqlalchemy import and_, or_, insert, update
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from pydantic import TypeAdapter
+from datetime import datetime
+import base64
+import json
 import os
-from . import models, schemas, database, utils
+from . import models, schemas, database, migrations, backup, utils, extraction_pool, ingest, search, responses, static_files
 
 app = FastAPI()
+app.add_middleware(responses.CompressionMiddleware)
+
+TENDER_LIST = TypeAdapter(List[schemas.Tender])
 
 # Mount API routes below...
 
-# Create tables
+# Create tables, then bring older databases up to date
 models.Base.metadata.create_all(bind=database.engine)
+migrations.run(database.engine)
+if database.IS_SQLITE:
+    search.init_sqlite(database.engine)
 
 def get_db():
     db = database.SessionLocal()
@@ -22,103 +31,197 @@ def get_db():
     finally:
         db.close()
 
+def _create_tenders(db: Session, entries: list):
+    """
+    Insert tenders and their checklists in one transaction.
+    entries is a list of (details, file_path) pairs; returns the new tenders with items loaded.
+    """
+    try:
+        db_tenders = [
+            models.Tender(
+                bid_number=details["bid_number"],
+                bid_end_date=details.get("bid_end_date"),
+                item_category=details.get("item_category"),
+                subject=details.get("subject"),
+                file_path=file_path,
+                **{column: details.get(column) for column in ingest.DETAIL_COLUMNS}
+            )
+            for details, file_path in entries
+        ]
+        db.add_all(db_tenders)
+        db.flush()
+
+        # Generate Checklist (one executemany for every item of every tender)
+        db.execute(insert(models.ChecklistItem), [
+            {"tender_id": db_tender.id, "name": item["name"], "code": item["code"]}
+            for db_tender in db_tenders
+            for item in utils.generate_checklist(db_tender.id)
+        ])
+        # Fields now; the PDF text follows from _index_page_text after the response
+        search.index_tenders(db, [(db_tender, None) for db_tender in db_tenders])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    tender_ids = [db_tender.id for db_tender in db_tenders]
+    db.expire_all()
+    created = db.query(models.Tender)\
+        .options(selectinload(models.Tender.items))\
+        .filter(models.Tender.id.in_(tender_ids))\
+        .all()
+    return sorted(created, key=lambda t: tender_ids.index(t.id))
+
+async def _index_page_text(tenders: list):
+    """
+    Background task run after an upload's response: reads the PDF text of
+    each (tender_id, file_path) in the extraction pool and adds it to the search index.
+    """
+    if not database.IS_SQLITE or utils.SEARCH_MAX_PAGES <= 0:
+        return
+    entries = []
+    for tender_id, file_path in tenders:
+        try:
+            entries.append((tender_id, await extraction_pool.read_page_text(file_path)))
+        except Exception as e:
+            # The tender stays searchable by its fields only
+            print(f"DEBUG: Failed to read PDF text of {file_path}: {e}")
+    db = database.SessionLocal()
+    try:
+        search.set_content(db, entries)
+        db.commit()
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown_extraction_pool():
+    extraction_pool.shutdown()
+
 @app.post("/upload/", response_model=schemas.Tender)
-async def upload_pdf(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_pdf(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: Session = Depends(get_db)):
     # Save file
     upload_dir = "uploads"
     if not os.path.exists(upload_dir):
         os.makedirs(upload_dir)
     
+    # Read the upload once, keep a copy in uploads/ and parse from memory
     file_path = os.path.join(upload_dir, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Extract details
-    details = utils.extract_pdf_details(file_path)
+    upload = await ingest.read_upload(file)
+    try:
+        upload.save_to(file_path)
+        details = await extraction_pool.extract(upload.source, digest=upload.sha256, filename=upload.filename)
+    finally:
+        upload.close()
     if not details.get("bid_number"):
         raise HTTPException(status_code=400, detail="Could not extract Bid Number from PDF")
 
-    # Create Tender
-    db_tender = models.Tender(
-        bid_number=details["bid_number"],
-        bid_end_date=details.get("bid_end_date"),
-        item_category=details.get("item_category"),
-        subject=details.get("subject"),
-        file_path=file_path
-    )
-    db.add(db_tender)
-    db.commit()
-    db.refresh(db_tender)
-
-    # Generate Checklist
-    checklist_data = utils.generate_checklist(db_tender.id)
-    for item in checklist_data:
-        db_item = models.ChecklistItem(
-            tender_id=db_tender.id,
-            name=item["name"],
-            code=item["code"]
-        )
-        db.add(db_item)
-    
-    db.commit()
-    db.refresh(db_tender)
+    db_tender = _create_tenders(db, [(details, file_path)])[0]
+    background_tasks.add_task(_index_page_text, [(db_tender.id, db_tender.file_path)])
     return db_tender
 
 @app.post("/upload-bulk/", response_model=List[schemas.Tender])
-async def upload_bulk_pdfs(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
-    results = []
-    errors = []
-    
+async def upload_bulk_pdfs(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...), stream: bool = False, db: Session = Depends(get_db)):
     upload_dir = "uploads"
     if not os.path.exists(upload_dir):
         os.makedirs(upload_dir)
 
+    file_paths = {}
+    used_paths = set()
     for file in files:
-        try:
-            file_path = os.path.join(upload_dir, file.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Extract details
-            details = utils.extract_pdf_details(file_path)
-            if not details.get("bid_number"):
-                errors.append(f"Failed to process {file.filename}: Could not extract Bid Number")
-                continue
+        upload = await ingest.read_upload(file, ingest.INGEST_BULK_SPOOL_MAX)
+        # Every file is on disk before any is parsed, so files of one batch
+        # sharing a name get "name (2).pdf", ... instead of overwriting each other
+        name, extension = os.path.splitext(file.filename)
+        file_path = os.path.join(upload_dir, file.filename)
+        copy = 1
+        while file_path in used_paths:
+            copy += 1
+            file_path = os.path.join(upload_dir, f"{name} ({copy}){extension}")
+        used_paths.add(file_path)
+        upload.save_to(file_path)
+        file_paths[upload] = file_path
+    filenames = {file_path: upload.filename for upload, file_path in file_paths.items()}
 
-            # Create Tender
-            db_tender = models.Tender(
-                bid_number=details["bid_number"],
-                bid_end_date=details.get("bid_end_date"),
-                item_category=details.get("item_category"),
-                subject=details.get("subject"),
-                file_path=file_path
-            )
-            db.add(db_tender)
-            db.commit()
-            db.refresh(db_tender)
-
-            # Generate Checklist
-            checklist_data = utils.generate_checklist(db_tender.id)
-            for item in checklist_data:
-                db_item = models.ChecklistItem(
-                    tender_id=db_tender.id,
-                    name=item["name"],
-                    code=item["code"]
-                )
-                db.add(db_item)
-            
-            db.commit()
-            db.refresh(db_tender)
-            results.append(db_tender)
+    # Parse in the process pool, yielding each file as soon as it completes
+    async def extracted():
+        seen = set()
+        async for upload, details, error in extraction_pool.extract_many(list(file_paths)):
+            upload.close()
+            file_path = file_paths[upload]
+            filename = upload.filename
+            if error == extraction_pool.AI_PENDING:
+                yield file_path, None, f"Failed to process {filename}: the AI fallback is at its rate limit, upload it again in a few minutes"
+            elif error:
+                yield file_path, None, f"Error processing {filename}: {error}"
+            elif not details.get("bid_number"):
+                yield file_path, None, f"Failed to process {filename}: Could not extract Bid Number"
+            elif details["bid_number"] in seen:
+                yield file_path, None, f"Failed to process {filename}: Duplicate Bid Number {details['bid_number']} in batch"
+            else:
+                seen.add(details["bid_number"])
+                yield file_path, details, None
+
+    if stream:
+        # Newline-delimited JSON, one line per file in completion order.
+        # Each tender is committed as soon as its file is parsed.
+        async def ndjson():
+            session = database.SessionLocal()
+            try:
+                async for file_path, details, error in extracted():
+                    if not error:
+                        try:
+                            db_tender = _create_tenders(session, [(details, file_path)])[0]
+                            # Runs once the stream has finished
+                            background_tasks.add_task(_index_page_text, [(db_tender.id, file_path)])
+                        except Exception as e:
+                            error = f"Error processing {filenames[file_path]}: {str(e)}"
+                    if error:
+                        line = {"error": error}
+                    else:
+                        line = {"tender": schemas.Tender.model_validate(db_tender).model_dump(mode="json")}
+                    yield json.dumps(line) + "\n"
+            finally:
+                session.close()
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    entries = []
+    errors = []
+    async for file_path, details, error in extracted():
+        if error:
+            errors.append(error)
+        else:
+            entries.append((details, file_path))
+
+    # Bid numbers already in the database would abort the whole batch transaction
+    existing = {
+        bid_number for (bid_number,) in db.query(models.Tender.bid_number)
+            .filter(models.Tender.bid_number.in_([details["bid_number"] for details, _ in entries]))
+    }
+    for details, file_path in [entry for entry in entries if entry[0]["bid_number"] in existing]:
+        errors.append(f"Failed to process {filenames[file_path]}: Bid Number {details['bid_number']} already exists")
+    entries = [entry for entry in entries if entry[0]["bid_number"] not in existing]
+
+    results = []
+    if entries:
+        try:
+            results = _create_tenders(db, entries)
+            background_tasks.add_task(_index_page_text, [(db_tender.id, db_tender.file_path) for db_tender in results])
         except Exception as e:
-            errors.append(f"Error processing {file.filename}: {str(e)}")
-            continue
+            errors.append(f"Error saving batch: {str(e)}")
             
     if not results and errors:
         raise HTTPException(status_code=400, detail="\n".join(errors))
         
     return results
 
+@app.get("/tenders/search", response_model=List[schemas.SearchHit])
+def search_tenders(q: str, limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
+    """Full-text search over tender fields and PDF text, best match first, with <mark> highlights"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    return search.search(db, q, limit=min(limit, 100), offset=offset)
+
 @app.get("/tenders/{tender_id}/download")
 def download_pdf(tender_id: int, db: Session = Depends(get_db)):
     db_tender = db.query(models.Tender).filter(models.Tender.id == tender_id).first()
@@ -130,20 +233,70 @@ def download_pdf(tender_id: int, db: Session = Depends(get_db)):
     
     return FileResponse(path=db_tender.file_path, filename=os.path.basename(db_tender.file_path), media_type='application/pdf')
 
+def _bucket_query(db: Session, bucket: int, now: datetime):
+    # 0 = active (soonest deadline first), 1 = expired (most recent first), 2 = undated.
+    # Each bucket is a range scan of ix_tenders_bid_end_date (see migrations.hot_queries)
+    end = models.Tender.bid_end_date
+    query = db.query(models.Tender).options(selectinload(models.Tender.items))
+    if bucket == 0:
+        return query.filter(end >= now).order_by(end.asc(), models.Tender.id)
+    if bucket == 1:
+        return query.filter(end < now).order_by(end.desc(), models.Tender.id)
+    return query.filter(end.is_(None)).order_by(models.Tender.id)
+
+def _encode_cursor(bucket: int, tender):
+    end_date = tender.bid_end_date.isoformat() if tender.bid_end_date else None
+    return base64.urlsafe_b64encode(json.dumps([bucket, end_date, tender.id]).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        bucket, end_date, tender_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(bucket), datetime.fromisoformat(end_date) if end_date else None, int(tender_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after_cursor(bucket: int, end_date, tender_id: int):
+    # Rows of the cursor's bucket that sort after it; later buckets start from the top
+    end = models.Tender.bid_end_date
+    if bucket == 0:
+        return or_(end > end_date, and_(end == end_date, models.Tender.id > tender_id))
+    if bucket == 1:
+        return or_(end < end_date, and_(end == end_date, models.Tender.id > tender_id))
+    return models.Tender.id > tender_id
+
 @app.get("/tenders/", response_model=List[schemas.Tender])
-def read_tenders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    from datetime import datetime
+def read_tenders(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Active tenders by nearest deadline, then expired (latest first), then undated.
+    Pass the X-Next-Cursor response header back as ?cursor= to fetch the next page;
+    skip is only honoured on the first page.
+    """
     now = datetime.utcnow()
-    
-    # Fetch all (or limit) - sorting in memory for simplicity with SQLite/Custom logic
-    # Optimization: For large datasets, use SQL CASE WHEN
-    tenders = db.query(models.Tender).all()
-    
-    active = sorted([t for t in tenders if t.bid_end_date and t.bid_end_date >= now], key=lambda x: x.bid_end_date)
-    expired = sorted([t for t in tenders if t.bid_end_date and t.bid_end_date < now], key=lambda x: x.bid_end_date, reverse=True)
-    none_dates = [t for t in tenders if not t.bid_end_date]
-    
-    return active + expired + none_dates
+    start_bucket, end_date, tender_id = _decode_cursor(cursor) if cursor else (0, None, None)
+
+    # Fill the page from each bucket in turn
+    rows = []
+    for bucket in range(start_bucket, 3):
+        query = _bucket_query(db, bucket, now)
+        if cursor and bucket == start_bucket:
+            query = query.filter(_after_cursor(bucket, end_date, tender_id))
+        elif skip and not cursor:
+            in_bucket = query.count()
+            if in_bucket <= skip:
+                skip -= in_bucket
+                continue
+            query = query.offset(skip)
+            skip = 0
+        rows += [(tender, bucket) for tender in query.limit(limit - len(rows)).all()]
+        if len(rows) >= limit:
+            break
+
+    headers = {}
+    if len(rows) == limit:
+        last_tender, last_bucket = rows[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last_bucket, last_tender)
+
+    return responses.model_response(TENDER_LIST, [tender for tender, _ in rows], headers)
 
 @app.put("/checklist/{item_id}", response_model=schemas.ChecklistItem)
 def update_checklist_item(item_id: int, item: schemas.ChecklistItemUpdate, db: Session = Depends(get_db)):
@@ -160,6 +313,38 @@ def update_checklist_item(item_id: int, item: schemas.ChecklistItemUpdate, db: S
     db.refresh(db_item)
     return db_item
 
+@app.patch("/tenders/{tender_id}/checklist", response_model=List[schemas.ChecklistItem])
+def update_checklist(tender_id: int, items: List[schemas.ChecklistItemPatch], db: Session = Depends(get_db)):
+    """
+    Applies several checklist item updates in one transaction (e.g. "mark all ready")
+    and returns the updated items. Nothing is changed if any item is not the tender's.
+    """
+    ids = [item.id for item in items]
+    if not ids:
+        raise HTTPException(status_code=400, detail="No checklist items provided")
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Duplicate checklist item ids")
+    if not db.query(models.Tender.id).filter(models.Tender.id == tender_id).first():
+        raise HTTPException(status_code=404, detail="Tender not found")
+
+    found = {row.id for row in db.query(models.ChecklistItem.id)
+             .filter(models.ChecklistItem.tender_id == tender_id, models.ChecklistItem.id.in_(ids))}
+    missing = [item_id for item_id in ids if item_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Checklist items not found: {missing}")
+
+    # Bulk UPDATE by primary key; entries with the same fields share one executemany
+    changes = [{"id": item.id, **item.model_dump(exclude={"id"}, exclude_none=True)} for item in items]
+    changes = [change for change in changes if len(change) > 1]
+    if changes:
+        db.execute(update(models.ChecklistItem), changes)
+    db.commit()
+
+    return db.query(models.ChecklistItem)\
+        .filter(models.ChecklistItem.id.in_(ids))\
+        .order_by(models.ChecklistItem.id)\
+        .all()
+
 @app.put("/tenders/{tender_id}", response_model=schemas.Tender)
 def update_tender(tender_id: int, tender_update: schemas.TenderUpdate, db: Session = Depends(get_db)):
     db_tender = db.query(models.Tender).filter(models.Tender.id == tender_id).first()
@@ -168,6 +353,7 @@ def update_tender(tender_id: int, tender_update: schemas.TenderUpdate, db: Sessi
     
     if tender_update.nickname is not None:
         db_tender.nickname = tender_update.nickname
+        search.update_fields(db, db_tender)
     
     db.commit()
     db.refresh(db_tender)
@@ -175,31 +361,28 @@ def update_tender(tender_id: int, tender_update: schemas.TenderUpdate, db: Sessi
 
 @app.get("/backup")
 def get_backup():
-    file_path = "gemtracker.db"
-    if not os.path.exists(file_path):
+    """Zip of a consistent database snapshot plus uploads/, streamed as it is built"""
+    db_path = database.engine.url.database
+    if not database.IS_SQLITE or not db_path or not os.path.exists(db_path):
         raise HTTPException(status_code=404, detail="Database file not found")
-    
-    from datetime import datetime
+
+    # SQLite's backup API copies a consistent view, including commits still in the WAL.
+    # The copy is made once the response starts streaming, so it cannot outlive it
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return FileResponse(path=file_path, filename=f"gemtracker_backup_{timestamp}.db", media_type='application/octet-stream')
+    return StreamingResponse(
+        backup.stream_archive(db_path, "uploads", os.path.basename(db_path)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="gemtracker_backup_{timestamp}.zip"'}
+    )
 
-# Mount Static Files (MUST be at the very end, after all API routes)
+# Static Files (MUST be at the very end, after all API routes)
 static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+static_manifest = static_files.load(static_path)
 
-if os.path.exists(static_path):
-    app.mount("/_next", StaticFiles(directory=os.path.join(static_path, "_next")), name="next")
-else:
+if not static_manifest:
     print(f"Warning: Static path {static_path} not found. Frontend will not be served.")
 
-# Catch-all route for SPA (MUST be the very last route)
+# Catch-all route for SPA (MUST be the very last route): files, _next chunks, else index.html
 @app.get("/{full_path:path}")
-async def catch_all(full_path: str):
-    # Check if file exists in static
-    if os.path.exists(os.path.join(static_path, full_path)) and os.path.isfile(os.path.join(static_path, full_path)):
-        return FileResponse(os.path.join(static_path, full_path))
-    
-    # Otherwise return index.html for SPA routing
-    if os.path.exists(os.path.join(static_path, "index.html")):
-        return FileResponse(os.path.join(static_path, "index.html"))
-    
-    return JSONResponse({"error": "Frontend not found"}, status_code=404)
+async def catch_all(full_path: str, request: Request):
+    return static_files.respond(static_manifest, full_path, request.headers)
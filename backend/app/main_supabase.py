@@ -2,17 +2,17 @@
 FastAPI Main Application with Supabase Integration
 Handles PDF upload, parsing, and real-time data management
 """
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Header
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Header, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
-import shutil
+import asyncio
+import functools
+import json
 import os
-import tempfile
 from datetime import datetime
-from .supabase_client import get_supabase_client
-from . import utils
+from .supabase_client import get_supabase_client, execute, run
+from . import schemas, signed_urls, utils, extraction_pool, auth_cache, ingest, jobs, ingest_jobs, maintenance, scheduler, tender_sync, responses, static_files
 
 app = FastAPI(title="GEMtracker API", version="2.0")
 
@@ -24,15 +24,65 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(responses.CompressionMiddleware)
+
+_cleanup_task = None
+
+@app.on_event("startup")
+def start_job_workers():
+    jobs.start_workers([ingest_jobs.__name__])
+
+@app.on_event("startup")
+async def start_cleanup():
+    # Replaces the frontend cron's one-by-one deletes when enabled (CLEANUP_INTERVAL_HOURS)
+    global _cleanup_task
+    if maintenance.CLEANUP_INTERVAL_HOURS > 0:
+        _cleanup_task = asyncio.create_task(maintenance.run_periodically(get_supabase_client()))
+
+# Status flips and expiry reminders, driven by each active tender's deadline.
+# Uploads, edits and deletes reach it by polling, whichever process made them
+deadlines = scheduler.DeadlineScheduler(get_supabase_client())
+
+@deadlines.on_reminder
+def log_reminder(tender: dict):
+    print(f"DEBUG: Reminder: {tender.get('nickname') or tender['bid_number']} closes at {tender['bid_end_date']}")
+
+@app.on_event("startup")
+async def start_deadline_scheduler():
+    if scheduler.SCHEDULER_ENABLED:
+        deadlines.start()
+
+@app.on_event("shutdown")
+def shutdown_extraction_pool():
+    extraction_pool.shutdown()
+    jobs.stop_workers()
+    deadlines.stop()
+    if _cleanup_task:
+        _cleanup_task.cancel()
 
 # Dependency to get Supabase client
 def get_client():
     return get_supabase_client()
 
+async def _queue_indexing(tender: dict):
+    """
+    Queues a job that reads the PDF text into the tender's search row, so
+    uploads return without extracting text from every page
+    """
+    if utils.SEARCH_MAX_PAGES <= 0:
+        return
+    try:
+        await _jobs_call(jobs.enqueue, "tender_index", {
+            "tender_id": tender["id"],
+            "file_path": tender["file_path"]
+        }, owner=tender["company_id"])
+    except Exception as e:
+        # The tender is saved either way; it just stays searchable by its fields only
+        print(f"DEBUG: Failed to queue indexing of {tender['bid_number']}: {e}")
+
 # Dependency to verify JWT token and get user
 async def get_current_user(authorization: str = Header(None)):
     """Verify Supabase JWT token and return user data"""
-    print(f"DEBUG: Auth header received: {'Yes' if authorization else 'No'}")
     if not authorization or not authorization.startswith("Bearer "):
         print("DEBUG: Missing or invalid Bearer token")
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
@@ -41,21 +91,32 @@ async def get_current_user(authorization: str = Header(None)):
     
     try:
         client = get_client()
-        # Verify the token
-        user_response = client.auth.get_user(token)
-        if not user_response:
-            print("DEBUG: client.auth.get_user(token) returned None")
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        print(f"DEBUG: Token verified for user ID: {user_response.user.id}")
+        # Verify the token locally when the JWT secret/JWKS is configured,
+        # otherwise ask Supabase Auth
+        claims = await auth_cache.verify_token(token)
+        if claims:
+            user_id = claims["sub"]
+        else:
+            user_response = await run(client.auth.get_user, token)
+            if not user_response:
+                print("DEBUG: client.auth.get_user(token) returned None")
+                raise HTTPException(status_code=401, detail="Invalid token")
+            user_id = user_response.user.id
+        
+        cached_user = auth_cache.get_user(user_id)
+        if cached_user:
+            return cached_user
+        
+        print(f"DEBUG: Token verified for user ID: {user_id}")
         
         # Get user data from users table
-        user_data = client.table("users").select("*").eq("id", user_response.user.id).single().execute()
+        user_data = await execute(client.table("users").select("*").eq("id", user_id).single())
         if not user_data.data:
-            print(f"DEBUG: User {user_response.user.id} not found in public.users table")
+            print(f"DEBUG: User {user_id} not found in public.users table")
             raise HTTPException(status_code=404, detail="User not found in database")
         
         print("DEBUG: User authenticated successfully")
+        auth_cache.set_user(user_id, user_data.data)
         return user_data.data
     except Exception as e:
         print(f"DEBUG: Auth exception: {e}")
@@ -68,96 +129,89 @@ async def get_current_user(authorization: str = Header(None)):
 @app.post("/api/upload/")
 async def upload_pdf(
     file: UploadFile = File(...),
+    background: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Upload and parse PDF tender document
-    Extracts bid information and creates tender record in Supabase
+    Extracts bid information and creates tender record in Supabase.
+    With ?background=true the work is queued and a job id is returned
+    immediately; poll /api/jobs/{job_id} or stream /api/jobs/{job_id}/events.
     """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
+    if background:
+        upload = await ingest.read_upload(file)
+        try:
+            spool_path = await _jobs_call(ingest_jobs.spool_upload, upload)
+        finally:
+            upload.close()
+        job_id = await _jobs_call(jobs.enqueue, "tender_upload", {
+            "spool_path": spool_path,
+            "filename": upload.filename,
+            "sha256": upload.sha256,
+            "user": {"id": current_user["id"], "company_id": current_user["company_id"]}
+        }, owner=current_user["company_id"])
+        print(f"DEBUG: Queued upload of {file.filename} as job {job_id}")
+        return JSONResponse(status_code=202, content={"message": "Upload queued", "job_id": job_id, "status": "queued"})
+    
     try:
         print(f"DEBUG: Starting upload for {file.filename}")
         client = get_client()
         
-        # 1. Save file temporarily for parsing
-        # Use tempfile for Vercel/serverless compatibility
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, f"upload_{current_user['id']}_{file.filename}")
-        print(f"DEBUG: Saving temp file to {temp_path}")
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 2. Extract PDF data using pdfplumber
-        print(f"DEBUG: Extracting PDF details...")
+        # 1. Read the upload once (in memory, spilling to one temp file if large)
+        upload = await ingest.read_upload(file)
         try:
-            details = utils.extract_pdf_details(temp_path)
-            print(f"DEBUG: Extracted details: {details}")
-        except Exception as e:
-            print(f"DEBUG: PDF Extraction failed: {e}")
-            if os.path.exists(temp_path): os.remove(temp_path)
-            raise HTTPException(
-                status_code=422, 
-                detail=f"Unable to parse tender PDF. Please ensure it is a valid GeM bid document. Error: {str(e)}"
-            )
-        
-        if not details.get("bid_number"):
-            print("DEBUG: No bid number found in PDF")
-            if os.path.exists(temp_path): os.remove(temp_path)
-            raise HTTPException(
-                status_code=400, 
-                detail="Could not extract bid number from PDF. Please check if the document contains a valid GeM Bid Number."
-            )
-        
-        # 3. Upload PDF to Supabase Storage
-        storage_path = f"{current_user['company_id']}/{details['bid_number']}_{int(datetime.now().timestamp())}.pdf"
-        print(f"DEBUG: Uploading to storage bucket 'tender-pdfs' at path: {storage_path}")
-        
-        try:
-            with open(temp_path, 'rb') as f:
-                storage_response = client.storage.from_('tender-pdfs').upload(
+            # 2. Extract PDF data using pdfplumber
+            print(f"DEBUG: Extracting PDF details...")
+            try:
+                details = await extraction_pool.extract(upload.source, digest=upload.sha256, filename=upload.filename)
+                print(f"DEBUG: Extracted details: {details}")
+            except Exception as e:
+                print(f"DEBUG: PDF Extraction failed: {e}")
+                raise HTTPException(
+                    status_code=422, 
+                    detail=f"Unable to parse tender PDF. Please ensure it is a valid GeM bid document. Error: {str(e)}"
+                )
+            
+            if not details.get("bid_number"):
+                print("DEBUG: No bid number found in PDF")
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Could not extract bid number from PDF. Please check if the document contains a valid GeM Bid Number."
+                )
+            
+            # 3. Upload the same bytes to Supabase Storage
+            storage_path = f"{current_user['company_id']}/{details['bid_number']}_{int(datetime.now().timestamp())}.pdf"
+            print(f"DEBUG: Uploading to storage bucket 'tender-pdfs' at path: {storage_path}")
+            
+            try:
+                storage_response = await run(
+                    client.storage.from_('tender-pdfs').upload,
                     storage_path,
-                    f,
+                    upload.source,
                     file_options={"content-type": "application/pdf"}
                 )
-            print(f"DEBUG: Storage upload successful: {storage_response}")
-        except Exception as e:
-            print(f"DEBUG: Storage upload failed: {e}")
-            if os.path.exists(temp_path): os.remove(temp_path)
-            raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(e)}")
-        
-        # Clean up temp file
-        if os.path.exists(temp_path): os.remove(temp_path)
-        
-        # 4. Determine status based on end date
-        status = "active"
-        if details.get("bid_end_date"):
-            bid_end_date = details["bid_end_date"]
-            if isinstance(bid_end_date, datetime) and bid_end_date < datetime.utcnow():
-                status = "expired"
-        
-        # 5. Insert tender record into Supabase
-        tender_data = {
-            "company_id": current_user["company_id"],
-            "uploaded_by": current_user["id"],
-            "bid_number": details["bid_number"],
-            "bid_end_date": details.get("bid_end_date").isoformat() if details.get("bid_end_date") else None,
-            "item_category": details.get("item_category"),
-            "subject": details.get("subject"),
-            "file_path": storage_path,
-            "status": status
-        }
+                print(f"DEBUG: Storage upload successful: {storage_response}")
+            except Exception as e:
+                print(f"DEBUG: Storage upload failed: {e}")
+                raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(e)}")
+        finally:
+            upload.close()
+        
+        # 4. Insert tender record into Supabase (status derived from the end date)
+        tender_data = ingest.build_tender_record(details, current_user, storage_path)
         print(f"DEBUG: Inserting tender data: {tender_data}")
         
         try:
-            response = client.table("tenders").insert(tender_data).execute()
+            response = await execute(client.table("tenders").insert(tender_data))
             if not response.data:
                 print(f"DEBUG: Database insertion returned no data: {response}")
                 raise HTTPException(status_code=500, detail="Failed to create tender record")
             
             print(f"DEBUG: Tender record created successfully: {response.data[0]['id']}")
+            await _queue_indexing(response.data[0])
             return {
                 "message": "PDF uploaded successfully",
                 "tender": response.data[0]
@@ -181,86 +235,160 @@ async def bulk_upload_test():
 @app.post("/api/upload-bulk")
 async def upload_bulk_pdfs(
     files: List[UploadFile] = File(...),
+    stream: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Upload and parse multiple PDF tender documents
+    Files are parsed in parallel by the extraction pool; pass ?stream=true
+    to receive one NDJSON line per file as each one completes. Files needing
+    more Gemini calls than the rate limit allows in-request are queued as
+    background jobs and listed under "queued" (or as {"job": ...} lines).
     """
-    results = []
-    errors = []
     client = get_client()
-    temp_dir = tempfile.gettempdir()
+    skipped = []
+    uploads = []
 
     for file in files:
         if not file.filename.endswith('.pdf'):
-            errors.append(f"Skipped {file.filename}: Only PDF files are allowed")
+            skipped.append(f"Skipped {file.filename}: Only PDF files are allowed")
             continue
-            
-        temp_path = None
+
+        print(f"DEBUG: Processing bulk upload for {file.filename}")
+        uploads.append(await ingest.read_upload(file, ingest.INGEST_BULK_SPOOL_MAX))
+
+    async def queue_upload(upload):
+        # Parsed again in a job worker, whose Gemini calls wait on the rate limit off the request path
+        spool_path = await _jobs_call(ingest_jobs.spool_upload, upload)
+        job_id = await _jobs_call(jobs.enqueue, "tender_upload", {
+            "spool_path": spool_path,
+            "filename": upload.filename,
+            "sha256": upload.sha256,
+            "user": {"id": current_user["id"], "company_id": current_user["company_id"]}
+        }, owner=current_user["company_id"])
+        print(f"DEBUG: Queued {upload.filename} as job {job_id} for the AI fallback")
+        return {"filename": upload.filename, "job_id": job_id, "status": "queued"}
+
+    async def process():
+        for error in skipped:
+            yield None, error, None
+
         try:
-            print(f"DEBUG: Processing bulk upload for {file.filename}")
-            temp_path = os.path.join(temp_dir, f"bulk_{current_user['id']}_{int(datetime.now().timestamp())}_{file.filename}")
-            
-            with open(temp_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Extract PDF data
-            details = utils.extract_pdf_details(temp_path)
-            
-            if not details.get("bid_number"):
-                errors.append(f"Failed to process {file.filename}: Could not extract bid number")
-                if os.path.exists(temp_path): os.remove(temp_path)
-                continue
-            
-            # Upload PDF to Supabase Storage
-            storage_path = f"{current_user['company_id']}/{details['bid_number']}_{int(datetime.now().timestamp())}.pdf"
-            
-            with open(temp_path, 'rb') as f:
-                client.storage.from_('tender-pdfs').upload(
-                    storage_path,
-                    f,
-                    file_options={"content-type": "application/pdf"}
-                )
-            
-            # Determine status
-            status = "active"
-            if details.get("bid_end_date"):
-                bid_end_date = details["bid_end_date"]
-                if isinstance(bid_end_date, datetime) and bid_end_date < datetime.utcnow():
-                    status = "expired"
-            
-            # Insert tender record
-            tender_data = {
-                "company_id": current_user["company_id"],
-                "uploaded_by": current_user["id"],
-                "bid_number": details["bid_number"],
-                "bid_end_date": details.get("bid_end_date").isoformat() if details.get("bid_end_date") else None,
-                "item_category": details.get("item_category"),
-                "subject": details.get("subject"),
-                "file_path": storage_path,
-                "status": status
-            }
-            
-            response = client.table("tenders").insert(tender_data).execute()
-            if response.data:
-                results.append(response.data[0])
+            async for upload, details, error in extraction_pool.extract_many(uploads):
+                filename = upload.filename
+                try:
+                    if error == extraction_pool.AI_PENDING:
+                        yield None, None, await queue_upload(upload)
+                        continue
+
+                    if error:
+                        yield None, f"Error processing {filename}: {error}", None
+                        continue
+
+                    if not details.get("bid_number"):
+                        yield None, f"Failed to process {filename}: Could not extract bid number", None
+                        continue
                 
-        except Exception as e:
-            print(f"DEBUG: Error processing {file.filename}: {e}")
-            errors.append(f"Error processing {file.filename}: {str(e)}")
+                    # Upload PDF to Supabase Storage
+                    storage_path = f"{current_user['company_id']}/{details['bid_number']}_{int(datetime.now().timestamp())}.pdf"
+                
+                    await run(
+                        client.storage.from_('tender-pdfs').upload,
+                        storage_path,
+                        upload.source,
+                        file_options={"content-type": "application/pdf"}
+                    )
+                
+                    # Insert tender record
+                    tender_data = ingest.build_tender_record(details, current_user, storage_path)
+                
+                    response = await execute(client.table("tenders").insert(tender_data))
+                    if response.data:
+                        await _queue_indexing(response.data[0])
+                        yield response.data[0], None, None
+                    
+                except Exception as e:
+                    print(f"DEBUG: Error processing {filename}: {e}")
+                    yield None, f"Error processing {filename}: {str(e)}", None
+                finally:
+                    upload.close()
         finally:
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+            for upload in uploads:
+                upload.close()
+
+    if stream:
+        async def ndjson():
+            async for tender, error, job in process():
+                if job:
+                    line = {"job": job}
+                else:
+                    line = {"error": error} if error else {"tender": tender}
+                yield json.dumps(line) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results = []
+    errors = []
+    queued = []
+    async for tender, error, job in process():
+        if job:
+            queued.append(job)
+        elif error:
+            errors.append(error)
+        else:
+            results.append(tender)
     
-    if not results and errors:
+    if not results and not queued and errors:
         raise HTTPException(status_code=400, detail="\n".join(errors))
         
     return {
-        "message": f"Processed {len(results)} tenders successfully",
+        "message": f"Processed {len(results)} tenders successfully" + (f", {len(queued)} queued for AI extraction" if queued else ""),
         "tenders": results,
-        "errors": errors
+        "errors": errors,
+        "queued": queued
     }
 
+# ============================================
+# JOB ENDPOINTS
+# ============================================
+
+async def _jobs_call(fn, *args, **kwargs):
+    # The jobs database is plain sqlite3; keep its calls off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+async def _get_owned_job(job_id: str, current_user: dict):
+    job = await _jobs_call(jobs.get, job_id)
+    if not job or job["owner"] != current_user["company_id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _job_status(job: dict):
+    return {key: job[key] for key in ("id", "kind", "status", "stage", "progress", "result", "error", "created_at", "updated_at")}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Current state of a background job"""
+    return _job_status(await _get_owned_job(job_id, current_user))
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Server-sent events with the job state on every change, ending once it finishes"""
+    await _get_owned_job(job_id, current_user)
+
+    async def events():
+        last = None
+        while True:
+            job = await _jobs_call(jobs.get, job_id)
+            status = _job_status(job)
+            if status != last:
+                yield f"event: {job['status']}\ndata: {json.dumps(status)}\n\n"
+                last = status
+            if job["status"] in jobs.FINISHED_STATUSES:
+                break
+            await asyncio.sleep(jobs.JOB_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.post("/api/tenders/analyze-screenshot")
 async def analyze_screenshot(
     file: UploadFile = File(...),
@@ -291,34 +419,121 @@ async def analyze_screenshot(
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.get("/api/tenders/")
-async def get_tenders(current_user: dict = Depends(get_current_user)):
-    """Get all tenders for the user's company"""
+async def get_tenders(
+    since: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get all tenders for the user's company.
+
+    Every response carries an ETag and an X-Sync-Cursor header. Sending the
+    ETag back as If-None-Match returns 304 when nothing changed; sending the
+    cursor back as ?since= returns only what changed after it:
+    {"cursor", "full": false, "tenders", "checklist_items", "deleted"}.
+    If the cursor is too old to have kept its deletes, the full list comes
+    back as "tenders" with "full": true.
+    """
     try:
         client = get_client()
+        company_id = current_user["company_id"]
+
+        # Version first, so anything written while the data is read shows up in the next delta
+        version = await tender_sync.get_version(client, company_id)
+        headers = {"ETag": tender_sync.etag(version), "X-Sync-Cursor": tender_sync.encode_cursor(version)}
+        if tender_sync.etag_matches(if_none_match, version):
+            return Response(status_code=304, headers=headers)
+
+        if since:
+            try:
+                since_version, since_at = tender_sync.decode_cursor(since)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid sync cursor")
+            if not tender_sync.is_expired(since_at):
+                changes = await tender_sync.fetch_changes(client, company_id, since_version)
+                return responses.FastJSONResponse({"cursor": headers["X-Sync-Cursor"], "full": False, **changes}, headers=headers)
         
         # Fetch tenders with checklist items
-        response = client.table("tenders")\
-            .select("*, checklist_items(*)")\
-            .eq("company_id", current_user["company_id"])\
-            .order("bid_end_date", desc=False)\
-            .execute()
+        tenders = await execute(
+            client.table("tenders")
+                .select("*, checklist_items(*)")
+                .eq("company_id", company_id)
+                .order("bid_end_date", desc=False)
+        )
         
-        return response.data
+        if since:
+            return responses.FastJSONResponse({"cursor": headers["X-Sync-Cursor"], "full": True, "tenders": tenders.data,
+                                               "checklist_items": [], "deleted": {"tenders": [], "checklist_items": []}}, headers=headers)
+        # Rows are plain JSON already; render them directly instead of through jsonable_encoder
+        return responses.FastJSONResponse(tenders.data, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch tenders: {str(e)}")
 
+@app.get("/api/tenders/search")
+async def search_tenders(q: str, limit: int = 20, offset: int = 0, current_user: dict = Depends(get_current_user)):
+    """
+    Full-text search over the company's tenders (fields and PDF text), best match first.
+    Matches are wrapped in <mark> in subject_highlight and snippet.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    try:
+        client = get_client()
+        response = await execute(client.rpc("search_tenders", {
+            "p_company_id": current_user["company_id"],
+            "p_query": q,
+            "p_limit": min(limit, 100),
+            "p_offset": offset
+        }))
+        return response.data
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@app.get("/api/tenders/download-urls")
+async def get_download_urls(ids: str, current_user: dict = Depends(get_current_user)):
+    """
+    Signed PDF URLs for several tenders at once (e.g. a list view):
+    ?ids=<id>,<id>,... -> {"download_urls": {tender id: url}}. Tenders without
+    a PDF or of another company are left out; at most 100 ids per call.
+    """
+    tender_ids = list(dict.fromkeys(tender_id.strip() for tender_id in ids.split(",") if tender_id.strip()))
+    if not tender_ids:
+        raise HTTPException(status_code=400, detail="No tender ids provided")
+    if len(tender_ids) > 100:
+        raise HTTPException(status_code=400, detail="At most 100 tender ids per request")
+    try:
+        client = get_client()
+        
+        tenders = await execute(
+            client.table("tenders")
+                .select("id, file_path")
+                .in_("id", tender_ids)
+                .eq("company_id", current_user["company_id"])
+        )
+        paths = {tender["id"]: tender["file_path"] for tender in tenders.data if tender.get("file_path")}
+        urls = await signed_urls.sign_many(client, 'tender-pdfs', list(paths.values()))
+        
+        return {"download_urls": {tender_id: urls[path] for tender_id, path in paths.items() if urls.get(path)}}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to sign download URLs: {str(e)}")
+
 @app.get("/api/tenders/{tender_id}")
 async def get_tender(tender_id: str, current_user: dict = Depends(get_current_user)):
     """Get a specific tender with checklist items"""
     try:
         client = get_client()
         
-        response = client.table("tenders")\
-            .select("*, checklist_items(*)")\
-            .eq("id", tender_id)\
-            .eq("company_id", current_user["company_id"])\
-            .single()\
-            .execute()
+        response = await execute(
+            client.table("tenders")
+                .select("*, checklist_items(*)")
+                .eq("id", tender_id)
+                .eq("company_id", current_user["company_id"])
+                .single()
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Tender not found")
@@ -344,11 +559,12 @@ async def update_tender(
         if not update_data:
             raise HTTPException(status_code=400, detail="No update data provided")
         
-        response = client.table("tenders")\
-            .update(update_data)\
-            .eq("id", tender_id)\
-            .eq("company_id", current_user["company_id"])\
-            .execute()
+        response = await execute(
+            client.table("tenders")
+                .update(update_data)
+                .eq("id", tender_id)
+                .eq("company_id", current_user["company_id"])
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Tender not found or update failed")
@@ -366,12 +582,13 @@ async def delete_tender(tender_id: str, current_user: dict = Depends(get_current
         client = get_client()
         
         # 1. Get tender details (to get storage path)
-        tender_res = client.table("tenders")\
-            .select("file_path")\
-            .eq("id", tender_id)\
-            .eq("company_id", current_user["company_id"])\
-            .single()\
-            .execute()
+        tender_res = await execute(
+            client.table("tenders")
+                .select("file_path")
+                .eq("id", tender_id)
+                .eq("company_id", current_user["company_id"])
+                .single()
+        )
         
         if not tender_res.data:
             raise HTTPException(status_code=404, detail="Tender not found")
@@ -381,11 +598,12 @@ async def delete_tender(tender_id: str, current_user: dict = Depends(get_current
         # 2. Delete from database (tenders and checklist_items via CASCADE)
         # Note: In Supabase, if CASCADE is set, checklist_items will be deleted automatically.
         # Based on schema_v2.sql, checklist_items has REFERENCES tenders(id) ON DELETE CASCADE.
-        db_res = client.table("tenders")\
-            .delete()\
-            .eq("id", tender_id)\
-            .eq("company_id", current_user["company_id"])\
-            .execute()
+        db_res = await execute(
+            client.table("tenders")
+                .delete()
+                .eq("id", tender_id)
+                .eq("company_id", current_user["company_id"])
+        )
         
         if not db_res.data:
             raise HTTPException(status_code=500, detail="Failed to delete tender record")
@@ -393,7 +611,8 @@ async def delete_tender(tender_id: str, current_user: dict = Depends(get_current
         # 3. Delete from storage if file_path exists
         if file_path:
             try:
-                client.storage.from_('tender-pdfs').remove([file_path])
+                await run(client.storage.from_('tender-pdfs').remove, [file_path])
+                signed_urls.invalidate('tender-pdfs', file_path)
                 print(f"DEBUG: Successfully deleted file from storage: {file_path}")
             except Exception as se:
                 print(f"DEBUG: Warning: Failed to delete file from storage: {se}")
@@ -433,18 +652,55 @@ async def update_checklist_item(
         if notes is not None:
             update_data["notes"] = notes
         
-        response = client.table("checklist_items")\
-            .update(update_data)\
-            .eq("id", item_id)\
-            .execute()
+        # The company filter is the ownership check (see supabase/add_checklist_company.sql)
+        response = await execute(
+            client.table("checklist_items")
+                .update(update_data)
+                .eq("id", item_id)
+                .eq("company_id", current_user["company_id"])
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Checklist item not found")
         
         return response.data[0]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update checklist item: {str(e)}")
 
+@app.patch("/api/tenders/{tender_id}/checklist")
+async def update_checklist(
+    tender_id: str,
+    items: List[schemas.SupabaseChecklistItemPatch],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Update several checklist items of a tender in one call (e.g. "mark all ready").
+    The company is checked once and all items change in one statement, or none do.
+    """
+    ids = [item.id for item in items]
+    if not ids:
+        raise HTTPException(status_code=400, detail="No checklist items provided")
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Duplicate checklist item ids")
+    try:
+        client = get_client()
+        
+        # See supabase/add_checklist_batch_update.sql
+        response = await execute(client.rpc("update_checklist_items", {
+            "p_tender_id": tender_id,
+            "p_company_id": current_user["company_id"],
+            "p_user_id": current_user["id"],
+            "p_items": [item.model_dump(exclude_none=True) for item in items]
+        }))
+        
+        return sorted(response.data, key=lambda row: row.get("display_order") or 0)
+    except Exception as e:
+        if getattr(e, "code", None) == "P0002":
+            raise HTTPException(status_code=404, detail=getattr(e, "message", None) or "Checklist item not found")
+        raise HTTPException(status_code=500, detail=f"Failed to update checklist: {str(e)}")
+
 # ============================================
 # TEMPLATE ENDPOINTS
 # ============================================
@@ -455,11 +711,12 @@ async def get_templates(current_user: dict = Depends(get_current_user)):
     try:
         client = get_client()
         
-        response = client.table("templates")\
-            .select("*")\
-            .eq("is_public", True)\
-            .order("category")\
-            .execute()
+        response = await execute(
+            client.table("templates")
+                .select("*")
+                .eq("is_public", True)
+                .order("category")
+        )
         
         return response.data
     except Exception as e:
@@ -472,24 +729,22 @@ async def download_template(template_id: str, current_user: dict = Depends(get_c
         client = get_client()
         
         # Get template details
-        template = client.table("templates").select("*").eq("id", template_id).single().execute()
+        template = await execute(client.table("templates").select("*").eq("id", template_id).single())
         
         if not template.data:
             raise HTTPException(status_code=404, detail="Template not found")
         
         # Increment download count
-        client.table("templates")\
-            .update({"download_count": template.data["download_count"] + 1})\
-            .eq("id", template_id)\
-            .execute()
-        
-        # Get signed URL from Supabase Storage
-        file_url = client.storage.from_('template-files').create_signed_url(
-            template.data["file_path"],
-            60  # URL valid for 60 seconds
+        await execute(
+            client.table("templates")
+                .update({"download_count": template.data["download_count"] + 1})
+                .eq("id", template_id)
         )
         
-        return {"download_url": file_url['signedURL']}
+        # Get signed URL from Supabase Storage (cached, see signed_urls.py)
+        download_url = await signed_urls.sign(client, 'template-files', template.data["file_path"])
+        
+        return {"download_url": download_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download template: {str(e)}")
 
@@ -504,23 +759,21 @@ async def download_tender_pdf(tender_id: str, current_user: dict = Depends(get_c
         client = get_client()
         
         # Get tender
-        tender = client.table("tenders")\
-            .select("file_path")\
-            .eq("id", tender_id)\
-            .eq("company_id", current_user["company_id"])\
-            .single()\
-            .execute()
+        tender = await execute(
+            client.table("tenders")
+                .select("file_path")
+                .eq("id", tender_id)
+                .eq("company_id", current_user["company_id"])
+                .single()
+        )
         
         if not tender.data or not tender.data.get("file_path"):
             raise HTTPException(status_code=404, detail="Tender PDF not found")
         
-        # Get signed URL
-        file_url = client.storage.from_('tender-pdfs').create_signed_url(
-            tender.data["file_path"],
-            60  # URL valid for 60 seconds
-        )
+        # Get signed URL (cached, see signed_urls.py)
+        download_url = await signed_urls.sign(client, 'tender-pdfs', tender.data["file_path"])
         
-        return {"download_url": file_url['signedURL']}
+        return {"download_url": download_url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download PDF: {str(e)}")
 
@@ -530,33 +783,24 @@ async def download_checklist_doc(item_id: str, current_user: dict = Depends(get_
     try:
         client = get_client()
         
-        # Get checklist item
-        item = client.table("checklist_items")\
-            .select("document_url, tender_id")\
-            .eq("id", item_id)\
-            .single()\
-            .execute()
+        # Get the checklist item, only if it belongs to the user's company
+        item = await execute(
+            client.table("checklist_items")
+                .select("document_url")
+                .eq("id", item_id)
+                .eq("company_id", current_user["company_id"])
+                .limit(1)
+        )
         
-        if not item.data or not item.data.get("document_url"):
+        if not item.data or not item.data[0].get("document_url"):
             raise HTTPException(status_code=404, detail="Document not found")
-            
-        # Verify ownership via tender
-        tender = client.table("tenders")\
-            .select("company_id")\
-            .eq("id", item.data["tender_id"])\
-            .single()\
-            .execute()
-            
-        if not tender.data or tender.data["company_id"] != current_user["company_id"]:
-            raise HTTPException(status_code=403, detail="Forbidden")
         
         # Get signed URL (bucket name is compliance-docs as per prompt/setup)
-        file_url = client.storage.from_('compliance-docs').create_signed_url(
-            item.data["document_url"],
-            60
-        )
+        download_url = await signed_urls.sign(client, 'compliance-docs', item.data[0]["document_url"])
         
-        return {"download_url": file_url['signedURL']}
+        return {"download_url": download_url}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download document: {str(e)}")
 
@@ -574,17 +818,9 @@ async def health_check():
 # ============================================
 
 static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+static_manifest = static_files.load(static_path)
 
-if os.path.exists(static_path):
-    app.mount("/_next", StaticFiles(directory=os.path.join(static_path, "_next")), name="next")
-
-# Catch-all route for SPA
+# Catch-all route for SPA: files, _next chunks, else index.html
 @app.get("/{full_path:path}")
-async def catch_all(full_path: str):
-    if os.path.exists(os.path.join(static_path, full_path)) and os.path.isfile(os.path.join(static_path, full_path)):
-        return FileResponse(os.path.join(static_path, full_path))
-    
-    if os.path.exists(os.path.join(static_path, "index.html")):
-        return FileResponse(os.path.join(static_path, "index.html"))
-    
-    return JSONResponse({"error": "Frontend not found"}, status_code=404)
+async def catch_all(full_path: str, request: Request):
+    return static_files.respond(static_manifest, full_path, request.headers)
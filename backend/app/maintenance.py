@@ -0,0 +1,158 @@
+"""
+Expired Tender Cleanup
+Deletes tenders whose bid closed more than CLEANUP_RETENTION_DAYS ago, with
+their checklist items and PDFs, a page at a time: one batched storage
+remove([...]) per page of files and one set-based DELETE per page of rows.
+Files go before rows, so an interrupted run leaves nothing orphaned and the
+next run simply picks up the rows still there. Works against Supabase
+(main_supabase) and the self-hosted SQLite/Postgres database (main).
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CLEANUP_RETENTION_DAYS = float(os.getenv("CLEANUP_RETENTION_DAYS", "10"))
+# Tenders per page; ids travel in the PostgREST URL, so keep pages modest
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "100"))
+# How often main_supabase runs the cleanup in the background (0 = never)
+CLEANUP_INTERVAL_HOURS = float(os.getenv("CLEANUP_INTERVAL_HOURS", "0"))
+
+PDF_BUCKET = "tender-pdfs"
+
+
+def cutoff(retention_days: float = None) -> datetime:
+    """Tenders that closed before this are due for deletion"""
+    days = CLEANUP_RETENTION_DAYS if retention_days is None else retention_days
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _report(stats: dict, started: float) -> dict:
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["tenders_per_second"] = round(stats["tenders"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+async def cleanup_supabase(client, before: datetime = None, batch_size: int = None, dry_run: bool = False, progress=None) -> dict:
+    """
+    Deletes expired tenders of every company (needs the service key). Pages are
+    keyset-ordered by id, so rows that fail to delete are skipped, not retried
+    forever. progress(stats) is called after each page.
+    """
+    from .supabase_client import execute, run
+
+    before = before or cutoff()
+    batch_size = batch_size or CLEANUP_BATCH_SIZE
+    stats = {"tenders": 0, "files": 0, "pages": 0, "failed_files": 0}
+    started = time.perf_counter()
+    last_id = None
+
+    while True:
+        query = client.table("tenders").select("id, file_path").lt("bid_end_date", before.isoformat())
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = (await execute(query.order("id").limit(batch_size))).data
+        if not page:
+            break
+        last_id = page[-1]["id"]
+        ids = [tender["id"] for tender in page]
+        paths = [tender["file_path"] for tender in page if tender.get("file_path")]
+
+        if not dry_run:
+            if paths:
+                try:
+                    # Storage skips paths that are already gone, so retries are harmless
+                    await run(client.storage.from_(PDF_BUCKET).remove, paths)
+                except Exception as e:
+                    # Keep the rows so the next run retries their files
+                    print(f"DEBUG: Cleanup failed to remove {len(paths)} files: {e}")
+                    stats["failed_files"] += len(paths)
+                    stats["pages"] += 1
+                    continue
+            # checklist_items, tender_search and tombstones follow via ON DELETE CASCADE / triggers
+            deleted = (await execute(client.table("tenders").delete().in_("id", ids))).data
+            ids = [tender["id"] for tender in deleted]
+
+        stats["tenders"] += len(ids)
+        stats["files"] += len(paths)
+        stats["pages"] += 1
+        if progress:
+            progress(stats)
+        if len(page) < batch_size:
+            break
+
+    return _report(stats, started)
+
+
+def cleanup_database(db, before: datetime = None, batch_size: int = None, dry_run: bool = False, progress=None) -> dict:
+    """
+    Same cleanup for the self-hosted backend: PDFs under uploads/ are unlinked
+    and each page's checklist items, search rows and tenders are deleted in
+    one transaction
+    """
+    from . import models, search
+
+    # bid_end_date is stored as naive UTC
+    before = (before or cutoff()).astimezone(timezone.utc).replace(tzinfo=None)
+    batch_size = batch_size or CLEANUP_BATCH_SIZE
+    stats = {"tenders": 0, "files": 0, "pages": 0, "failed_files": 0}
+    started = time.perf_counter()
+    last_id = 0
+
+    while True:
+        page = db.query(models.Tender.id, models.Tender.file_path)\
+            .filter(models.Tender.bid_end_date < before, models.Tender.id > last_id)\
+            .order_by(models.Tender.id)\
+            .limit(batch_size)\
+            .all()
+        if not page:
+            break
+        last_id = page[-1].id
+        ids = [tender.id for tender in page]
+        paths = [tender.file_path for tender in page if tender.file_path]
+
+        if not dry_run:
+            for tender in page:
+                if not tender.file_path:
+                    continue
+                try:
+                    os.remove(tender.file_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Keep the row so the next run retries its file
+                    print(f"DEBUG: Cleanup failed to remove {tender.file_path}: {e}")
+                    stats["failed_files"] += 1
+                    ids.remove(tender.id)
+                    paths.remove(tender.file_path)
+            db.query(models.ChecklistItem).filter(models.ChecklistItem.tender_id.in_(ids)).delete(synchronize_session=False)
+            search.remove_tenders(db, ids)
+            db.query(models.Tender).filter(models.Tender.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+
+        stats["tenders"] += len(ids)
+        stats["files"] += len(paths)
+        stats["pages"] += 1
+        if progress:
+            progress(stats)
+        if len(page) < batch_size:
+            break
+
+    return _report(stats, started)
+
+
+async def run_periodically(client, interval_hours: float = None):
+    """Background task for main_supabase: cleans up now, then every interval_hours"""
+    interval = (interval_hours or CLEANUP_INTERVAL_HOURS) * 3600
+    while True:
+        try:
+            stats = await cleanup_supabase(client)
+            if stats["tenders"]:
+                print(f"DEBUG: Cleanup deleted {stats['tenders']} expired tenders ({stats['files']} files) "
+                      f"in {stats['seconds']}s")
+        except Exception as e:
+            print(f"DEBUG: Scheduled cleanup failed: {e}")
+        await asyncio.sleep(interval)
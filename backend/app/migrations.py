@@ -0,0 +1,148 @@
+"""
+Schema Migrations
+Versioned migrations for the self-hosted database (SQLite or DATABASE_URL).
+Each migration runs once, in its own transaction, and is recorded in
+schema_migrations; steps check the live schema first, so databases that
+already have a column or index (e.g. from create_all) are brought up to date
+without errors. Also EXPLAINs the hot queries to check they use their indexes
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import Column, DateTime, Float, Integer, JSON, MetaData, String, Table, and_, inspect, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from . import models
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS = []  # (version, name, fn(connection)), in version order
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return fn
+    return register
+
+
+def _add_columns(conn, table: str, columns):
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    for name, column_type in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type.compile(dialect=conn.dialect)}"))
+            print(f"Added {table}.{name}")
+
+
+def _create_index(conn, table: str, columns):
+    # Same names as SQLAlchemy's index=True, so create_all and migrations agree
+    name = f"ix_{table}_{'_'.join(columns)}"
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+@migration(1, "tender nickname and file path")
+def _tender_nickname_file_path(conn):
+    _add_columns(conn, "tenders", [("nickname", String()), ("file_path", String())])
+
+
+@migration(2, "bid data sheet columns")
+def _bid_details(conn):
+    _add_columns(conn, "tenders", [
+        ("bid_opening_date", DateTime()),
+        ("ministry", String()),
+        ("department", String()),
+        ("buyer_organisation", String()),
+        ("quantity", Integer()),
+        ("emd_amount", Float()),
+        ("epbg_percentage", Float()),
+        ("estimated_value", Float()),
+        ("contract_period", String()),
+        ("consignee_locations", JSON()),
+    ])
+    for column in ("ministry", "department", "buyer_organisation", "emd_amount", "estimated_value"):
+        _create_index(conn, "tenders", [column])
+
+
+@migration(3, "tender list and checklist indexes")
+def _list_indexes(conn):
+    # GET /tenders/ range-scans bid_end_date per bucket; checklists are loaded by tender_id
+    _create_index(conn, "tenders", ["bid_end_date"])
+    _create_index(conn, "checklist_items", ["tender_id"])
+
+
+def _applied(conn) -> dict:
+    return {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+
+
+def run(engine) -> list:
+    """Applies pending migrations in order; returns the versions applied"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        applied = _applied(conn)
+
+    done = []
+    for version, name, fn in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                fn(conn)
+                conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        except DBAPIError:
+            # Another process (e.g. a second server worker) may have applied it first: losing
+            # the race fails on the schema_migrations insert, or on the step itself ("duplicate column")
+            with engine.connect() as conn:
+                if version in _applied(conn):
+                    continue
+            raise
+        print(f"Applied migration {version}: {name}")
+        done.append(version)
+    return done
+
+
+def status(engine) -> list:
+    """(version, name, applied_at or None) for every known migration"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        applied = _applied(conn)
+    return [(version, name, applied.get(version)) for version, name, _ in MIGRATIONS]
+
+
+def hot_queries():
+    """(label, statement, index it must use): the statements behind GET /tenders/ and checklist loads"""
+    now = datetime.utcnow()
+    later = now + timedelta(days=1)
+    tender, item = models.Tender, models.ChecklistItem
+    end = tender.bid_end_date
+    page = 100
+    return [
+        ("tender list: active", select(tender).where(end >= now).order_by(end.asc(), tender.id).limit(page), "ix_tenders_bid_end_date"),
+        ("tender list: expired", select(tender).where(end < now).order_by(end.desc(), tender.id).limit(page), "ix_tenders_bid_end_date"),
+        ("tender list: next page", select(tender).where(end >= now, or_(end > later, and_(end == later, tender.id > 1)))
+         .order_by(end.asc(), tender.id).limit(page), "ix_tenders_bid_end_date"),
+        ("tender list: undated", select(tender).where(end.is_(None)).order_by(tender.id).limit(page), "ix_tenders_bid_end_date"),
+        ("checklists of a page", select(item).where(item.tender_id.in_(list(range(1, page + 1)))), "ix_checklist_items_tender_id"),
+        ("checklist of one tender", select(item).where(item.tender_id == 1), "ix_checklist_items_tender_id"),
+    ]
+
+
+def check_query_plans(engine) -> list:
+    """EXPLAINs each hot query; returns (label, index, plan text, uses index)"""
+    results = []
+    with engine.connect() as conn:
+        sqlite = conn.dialect.name == "sqlite"
+        if not sqlite:
+            # Small tables are cheaper to scan; ask whether the index is usable at all
+            conn.execute(text("SET enable_seqscan = off"))
+        for label, statement, index in hot_queries():
+            compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            rows = conn.exec_driver_sql(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + str(compiled)).all()
+            plan = "\n".join(str(row[-1]) for row in rows)
+            results.append((label, index, plan, index in plan))
+        if not sqlite:
+            conn.execute(text("RESET enable_seqscan"))
+    return results
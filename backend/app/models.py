@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -8,9 +8,22 @@ class Tender(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     bid_number = Column(String, unique=True, index=True)
-    bid_end_date = Column(DateTime)
+    bid_end_date = Column(DateTime, index=True)
     item_category = Column(String)
     subject = Column(String) # Short description
+
+    # Bid data sheet, extracted once at ingestion
+    bid_opening_date = Column(DateTime, nullable=True)
+    ministry = Column(String, nullable=True, index=True)
+    department = Column(String, nullable=True, index=True)
+    buyer_organisation = Column(String, nullable=True, index=True)
+    quantity = Column(Integer, nullable=True)
+    emd_amount = Column(Float, nullable=True, index=True)
+    epbg_percentage = Column(Float, nullable=True)
+    estimated_value = Column(Float, nullable=True, index=True)
+    contract_period = Column(String, nullable=True)
+    consignee_locations = Column(JSON, nullable=True) # List of consignee locations
+
     nickname = Column(String, nullable=True)
     file_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -21,7 +34,7 @@ class ChecklistItem(Base):
     __tablename__ = "checklist_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    tender_id = Column(Integer, ForeignKey("tenders.id"))
+    tender_id = Column(Integer, ForeignKey("tenders.id"), index=True)
     name = Column(String)
     code = Column(String) # e.g. F-1
     is_ready = Column(Boolean, default=False)
@@ -0,0 +1,181 @@
+"""
+Fast Responses
+orjson-rendered JSON for the large list endpoints, a pydantic dump_json path
+that skips FastAPI's per-field encoding of response models, and opt-in
+gzip/brotli compression of responses above a size threshold
+"""
+import os
+import zlib
+import anyio
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard json renderer
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+load_dotenv()
+
+# Encodings to offer, in order of preference, e.g. "br,gzip" (empty = off)
+RESPONSE_COMPRESSION = [
+    encoding.strip() for encoding in os.getenv("RESPONSE_COMPRESSION", "").split(",")
+    if encoding.strip() in ("br", "gzip") and (encoding.strip() != "br" or brotli)
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Chunks at least this large are compressed in a worker thread instead of on the event loop
+COMPRESSION_THREAD_MIN_SIZE = int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", str(64 * 1024)))  # bytes
+
+# PDFs, images and zips are already compressed
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson. Meant for content that is already plain
+    JSON data (Supabase rows, model dumps) returned directly from an endpoint,
+    which skips FastAPI's jsonable_encoder walk over every nested dict.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+
+def model_response(adapter, objects, headers: dict = None) -> Response:
+    """
+    Validates ORM objects against a pydantic TypeAdapter and serializes them
+    straight to JSON bytes in pydantic-core, instead of FastAPI's
+    validate -> dict -> json.dumps round trip for response_model endpoints
+    """
+    body = adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _accepted(accept_encoding: str):
+    """Picks the first configured encoding the client accepts (q > 0)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip()] = quality
+    for encoding in RESPONSE_COMPRESSION:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        if self._brotli:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if finish else self._brotli.flush())
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+    async def compress_async(self, data: bytes, finish: bool) -> bytes:
+        # zlib and brotli release the GIL, so a large body costs the loop nothing;
+        # calls are awaited one at a time, so the compressor is never shared
+        if len(data) < COMPRESSION_THREAD_MIN_SIZE:
+            return self.compress(data, finish)
+        return await anyio.to_thread.run_sync(self.compress, data, finish)
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON/text responses with the best encoding in
+    RESPONSE_COMPRESSION that the client accepts. Bodies sent in one piece
+    are compressed only above COMPRESSION_MIN_SIZE; streamed bodies are
+    compressed chunk by chunk; chunks above COMPRESSION_THREAD_MIN_SIZE are
+    compressed in a worker thread. Event streams, already-encoded responses
+    (e.g. precompressed static files) and binary files pass through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RESPONSE_COMPRESSION:
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None  # set once the response is known to be compressed
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = Headers(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or content_type.startswith("text/event-stream")
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < COMPRESSION_MIN_SIZE)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # The compressed body is a different representation of the same resource
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = await compressor.compress_async(body, finish=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            body = await compressor.compress_async(body, finish=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
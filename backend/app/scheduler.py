@@ -0,0 +1,291 @@
+"""
+Deadline Scheduler
+Keeps every active tender's bid_end_date in a min-heap, loaded once at startup
+and kept current by polling the tenders written since the last poll
+(updated_at), so uploads, edits and deletes made by any server process or job
+worker are seen. A single task sleeps until the earliest deadline (or the next
+poll), then flips due tenders to "expired" (one batched UPDATE) and emits
+reminder events REMINDER_LEAD_HOURS before each deadline. Each change costs
+O(log n); nothing rescans the tenders table.
+
+Reminders that fell due while the server was down are not replayed. Run the
+scheduler in one server process only (SCHEDULER_ENABLED=0 on the others), or
+reminders are emitted once per process.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from .supabase_client import execute
+
+load_dotenv()
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+REMINDER_LEAD_HOURS = float(os.getenv("REMINDER_LEAD_HOURS", "24"))
+# How often tenders written since the last poll are re-read
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "10"))
+# updated_at is the writing transaction's start time, so a slow transaction can
+# commit a row older than the last poll; each poll re-reads this much history
+SCHEDULER_POLL_OVERLAP_SECONDS = float(os.getenv("SCHEDULER_POLL_OVERLAP_SECONDS", "60"))
+
+TRACKED_COLUMNS = "id, company_id, bid_number, nickname, bid_end_date, status"
+
+LOAD_PAGE_SIZE = 1000
+UPDATE_BATCH_SIZE = 100
+
+EXPIRE = "expire"
+REMIND = "remind"
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds of a Supabase timestamp string (or datetime); None if missing"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of (due time, sequence, tender id, event kind, version). Updates
+    and deletes do not search the heap: they bump the tender's version, and
+    entries with an old version are dropped when they reach the top.
+    schedule() and cancel() do nothing until load() has run, so a process
+    that never starts the scheduler keeps no state.
+    """
+
+    def __init__(self, client, reminder_lead_hours: float = None, clock=time.time):
+        self.client = client
+        self.reminder_lead = (REMINDER_LEAD_HOURS if reminder_lead_hours is None else reminder_lead_hours) * 3600
+        self.clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._versions = {}  # tender id -> current version
+        self._tenders = {}  # tender id -> fields reminder listeners get
+        self._listeners = []
+        self._active = False
+        self._task = None
+        self._polled_at = None
+        self.stats = {"expired": 0, "reminders": 0, "updates": 0, "polls": 0}
+
+    def __len__(self):
+        return len(self._tenders)
+
+    def on_reminder(self, callback):
+        """Registers callback(tender) for reminder events; may be a coroutine function"""
+        self._listeners.append(callback)
+        return callback
+
+    def schedule(self, tender: dict, remind_late: bool = True):
+        """
+        Adds or re-times a tender (after insert/update); inactive or undated
+        tenders are dropped. A tender already inside the reminder window is
+        reminded right away, unless remind_late is off (the startup load).
+        """
+        if not self._active:
+            return
+        tender_id = tender["id"]
+        deadline = _timestamp(tender.get("bid_end_date"))
+        if deadline is None or tender.get("status", "active") != "active":
+            self.cancel(tender_id)
+            return
+
+        fields = {key: tender.get(key) for key in ("id", "company_id", "bid_number", "nickname", "bid_end_date")}
+        current = self._tenders.get(tender_id)
+        if current and _timestamp(current["bid_end_date"]) == deadline:
+            # Same deadline (e.g. a nickname edit, or a row polled twice): keep its entries
+            current.update(fields)
+            return
+
+        version = self._versions.get(tender_id, 0) + 1
+        self._versions[tender_id] = version
+        self._tenders[tender_id] = fields
+        now = self.clock()
+        reminder_at = deadline - self.reminder_lead
+        if reminder_at > now:
+            heapq.heappush(self._heap, (reminder_at, next(self._sequence), tender_id, REMIND, version))
+        elif deadline > now and remind_late:
+            heapq.heappush(self._heap, (now, next(self._sequence), tender_id, REMIND, version))
+        heapq.heappush(self._heap, (deadline, next(self._sequence), tender_id, EXPIRE, version))
+        self._compact()
+
+    def cancel(self, tender_id):
+        """Forgets a tender (after delete); its heap entries go stale"""
+        if self._active and tender_id in self._tenders:
+            del self._tenders[tender_id]
+            self._versions[tender_id] = self._versions.get(tender_id, 0) + 1
+
+    def _compact(self):
+        # Stale entries are only dropped when popped; rebuild once they dominate the heap
+        if len(self._heap) > 64 and len(self._heap) > 4 * (len(self._tenders) + 1):
+            self._heap = [entry for entry in self._heap if self._versions.get(entry[2]) == entry[4] and entry[2] in self._tenders]
+            heapq.heapify(self._heap)
+
+    def next_due(self) -> float:
+        """Due time of the earliest live entry, or None"""
+        while self._heap:
+            _, _, tender_id, _, version = self._heap[0]
+            if tender_id in self._tenders and self._versions.get(tender_id) == version:
+                return self._heap[0][0]
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float = None):
+        """Removes and returns the (tenders to expire, tenders to remind) that are due by now"""
+        now = self.clock() if now is None else now
+        expired, reminders = [], []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, tender_id, kind, version = heapq.heappop(self._heap)
+            if tender_id not in self._tenders or self._versions.get(tender_id) != version:
+                continue
+            if kind == REMIND:
+                reminders.append(self._tenders[tender_id])
+            else:
+                expired.append(self._tenders[tender_id])
+                self.cancel(tender_id)
+        return expired, reminders
+
+    async def load(self):
+        """Schedules every active, dated tender (service key: all companies), keyset-paged by id"""
+        self._active = True
+        # Tenders written while the pages load are picked up by the first poll
+        self._polled_at = self.clock()
+        last_id = None
+        while True:
+            query = self.client.table("tenders")\
+                .select(TRACKED_COLUMNS)\
+                .eq("status", "active")\
+                .not_.is_("bid_end_date", "null")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = (await execute(query.order("id").limit(LOAD_PAGE_SIZE))).data
+            for tender in page:
+                self.schedule(tender, remind_late=False)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            last_id = page[-1]["id"]
+
+    async def poll(self):
+        """Re-times every tender written since the last poll, by whichever process wrote it"""
+        since = _iso(self._polled_at - SCHEDULER_POLL_OVERLAP_SECONDS)
+        started = self.clock()
+        offset = 0
+        while True:
+            # Rows of one bulk insert share updated_at, so page by offset within the short window
+            page = (await execute(
+                self.client.table("tenders")
+                    .select(TRACKED_COLUMNS)
+                    .gt("updated_at", since)
+                    .order("updated_at")
+                    .order("id")
+                    .range(offset, offset + LOAD_PAGE_SIZE - 1)
+            )).data
+            for tender in page:
+                self.schedule(tender)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            offset += LOAD_PAGE_SIZE
+        # Only after a complete read, so a failed poll's window is read again
+        self._polled_at = started
+        self.stats["polls"] += 1
+
+    async def _expire(self, tender_ids: list):
+        now = _iso(self.clock())
+        for offset in range(0, len(tender_ids), UPDATE_BATCH_SIZE):
+            batch = tender_ids[offset:offset + UPDATE_BATCH_SIZE]
+            # Only tenders still active and still past their deadline: one extended
+            # since the last poll is left alone (the next poll re-times it).
+            # Re-running a batch is harmless
+            await execute(
+                self.client.table("tenders")
+                    .update({"status": "expired"})
+                    .in_("id", batch)
+                    .eq("status", "active")
+                    .lte("bid_end_date", now)
+            )
+            self.stats["updates"] += 1
+        self.stats["expired"] += len(tender_ids)
+
+    async def _current(self, tenders: list) -> list:
+        # Drops tenders deleted, closed or re-timed since they were scheduled
+        current = {}
+        ids = [tender["id"] for tender in tenders]
+        for offset in range(0, len(ids), UPDATE_BATCH_SIZE):
+            rows = (await execute(
+                self.client.table("tenders")
+                    .select(TRACKED_COLUMNS)
+                    .in_("id", ids[offset:offset + UPDATE_BATCH_SIZE])
+                    .eq("status", "active")
+            )).data
+            current.update((row["id"], row) for row in rows)
+        return [
+            tender for tender in tenders
+            if tender["id"] in current and _timestamp(current[tender["id"]]["bid_end_date"]) == _timestamp(tender["bid_end_date"])
+        ]
+
+    async def _remind(self, tenders: list):
+        for tender in await self._current(tenders):
+            self.stats["reminders"] += 1
+            for callback in self._listeners:
+                try:
+                    result = callback(tender)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    print(f"DEBUG: Reminder listener failed for {tender.get('bid_number')}: {e}")
+
+    async def process_due(self):
+        """Handles everything due now; returns (expired count, reminder count)"""
+        expired, reminders = self.pop_due()
+        if expired:
+            try:
+                await self._expire([tender["id"] for tender in expired])
+            except Exception as e:
+                print(f"DEBUG: Failed to expire {len(expired)} tenders, retrying shortly: {e}")
+                retry = self.clock() + 30
+                for tender in expired:
+                    # Tracked again with its fields, so a poll that still sees it active keeps the retry
+                    tender_id = tender["id"]
+                    self._versions[tender_id] = self._versions.get(tender_id, 0) + 1
+                    self._tenders[tender_id] = tender
+                    heapq.heappush(self._heap, (retry, next(self._sequence), tender_id, EXPIRE, self._versions[tender_id]))
+        if reminders:
+            await self._remind(reminders)
+        return len(expired), len(reminders)
+
+    async def run(self):
+        """Loads the heap, then sleeps until each deadline or poll for as long as the app runs"""
+        await self.load()
+        print(f"DEBUG: Deadline scheduler tracking {len(self)} active tenders")
+        next_poll = self.clock() + SCHEDULER_POLL_SECONDS
+        while True:
+            try:
+                if self.clock() >= next_poll:
+                    next_poll = self.clock() + SCHEDULER_POLL_SECONDS
+                    await self.poll()
+                await self.process_due()
+            except Exception as e:
+                print(f"DEBUG: Deadline scheduler error: {e}")
+            due = self.next_due()
+            wake_at = next_poll if due is None else min(due, next_poll)
+            await asyncio.sleep(max(wake_at - self.clock(), 0))
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+        self._active = False
+        self._heap, self._versions, self._tenders = [], {}, {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ChecklistItemBase(BaseModel):
@@ -12,6 +12,17 @@ class ChecklistItemUpdate(BaseModel):
     is_ready: Optional[bool] = None
     is_submitted: Optional[bool] = None
 
+# Batch checklist updates: one entry per item, unset fields are left alone
+class ChecklistItemPatch(ChecklistItemUpdate):
+    id: int
+
+class SupabaseChecklistItemPatch(BaseModel):
+    id: str
+    is_ready: Optional[bool] = None
+    is_submitted: Optional[bool] = None
+    document_url: Optional[str] = None
+    notes: Optional[str] = None
+
 class ChecklistItem(ChecklistItemBase):
     id: int
     tender_id: int
@@ -25,6 +36,16 @@ class TenderBase(BaseModel):
     subject: Optional[str] = None
     nickname: Optional[str] = None
     file_path: Optional[str] = None
+    bid_opening_date: Optional[datetime] = None
+    ministry: Optional[str] = None
+    department: Optional[str] = None
+    buyer_organisation: Optional[str] = None
+    quantity: Optional[int] = None
+    emd_amount: Optional[float] = None
+    epbg_percentage: Optional[float] = None
+    estimated_value: Optional[float] = None
+    contract_period: Optional[str] = None
+    consignee_locations: Optional[List[str]] = None
 
 class TenderUpdate(BaseModel):
     nickname: Optional[str] = None
@@ -38,3 +59,13 @@ class Tender(TenderBase):
     items: List[ChecklistItem] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+class SearchHit(BaseModel):
+    id: int
+    bid_number: str
+    subject: Optional[str] = None
+    nickname: Optional[str] = None
+    bid_end_date: Optional[datetime] = None
+    rank: float
+    highlights: Dict[str, str] = {}
+    snippet: Optional[str] = None
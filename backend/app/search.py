@@ -0,0 +1,155 @@
+"""
+Tender Search
+SQLite FTS5 index over each tender's extracted fields and PDF page text,
+ranked with weighted bm25 and returned with highlighted fields and a content
+snippet. On Postgres (DATABASE_URL) there is no FTS5 table and search falls
+back to matching the fields with ILIKE; the Supabase backend uses the
+tsvector index in supabase/add_tender_search.sql instead
+"""
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Session
+from .models import Tender
+
+FIELD_COLUMNS = ("bid_number", "nickname", "subject", "item_category", "ministry", "department", "buyer_organisation")
+COLUMNS = FIELD_COLUMNS + ("content",)
+# bm25 weight per column, in COLUMNS order: a hit in the bid number or title beats one in the body text
+WEIGHTS = (10.0, 6.0, 4.0, 3.0, 2.0, 2.0, 2.0, 1.0)
+
+MARK_START, MARK_END = "<mark>", "</mark>"
+SNIPPET_TOKENS = 16
+
+
+def init_sqlite(engine):
+    """Creates the FTS5 table and indexes the fields of any tender that is not in it yet"""
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'tender_search'")).first()
+        if not exists:
+            conn.execute(text(f"CREATE VIRTUAL TABLE tender_search USING fts5({', '.join(COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"))
+            conn.execute(text("INSERT INTO tender_search (tender_search, rank) VALUES ('rank', :rank)"),
+                         {"rank": f"bm25({', '.join(str(weight) for weight in WEIGHTS)})"})
+        # Tenders uploaded before the index existed are searchable by their fields only
+        conn.execute(text(f"""
+            INSERT INTO tender_search (rowid, {', '.join(FIELD_COLUMNS)})
+            SELECT id, {', '.join(FIELD_COLUMNS)} FROM tenders
+            WHERE id NOT IN (SELECT rowid FROM tender_search)
+        """))
+
+
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def index_tenders(db: Session, entries: list):
+    """
+    Adds (tender, page_text) pairs to the index inside the caller's transaction.
+    page_text may be None and filled in later with set_content.
+    """
+    if not entries or not _is_sqlite(db):
+        return
+    db.execute(
+        text(f"INSERT INTO tender_search (rowid, {', '.join(COLUMNS)}) VALUES (:rowid, {', '.join(':' + column for column in COLUMNS)})"),
+        [
+            {"rowid": tender.id, "content": page_text, **{column: getattr(tender, column) for column in FIELD_COLUMNS}}
+            for tender, page_text in entries
+        ]
+    )
+
+
+def update_fields(db: Session, tender):
+    """Re-indexes a tender's fields (e.g. after a nickname change), keeping its page text"""
+    if not _is_sqlite(db):
+        return
+    db.execute(
+        text(f"UPDATE tender_search SET {', '.join(f'{column} = :{column}' for column in FIELD_COLUMNS)} WHERE rowid = :rowid"),
+        {"rowid": tender.id, **{column: getattr(tender, column) for column in FIELD_COLUMNS}}
+    )
+
+
+def set_content(db: Session, entries: list):
+    """Stores the PDF text of already indexed tenders, given (tender_id, page_text) pairs"""
+    if not entries or not _is_sqlite(db):
+        return
+    db.execute(
+        text("UPDATE tender_search SET content = :content WHERE rowid = :rowid"),
+        [{"rowid": tender_id, "content": page_text} for tender_id, page_text in entries]
+    )
+
+
+def remove_tenders(db: Session, tender_ids: list):
+    """Drops deleted tenders from the index inside the caller's transaction"""
+    if not tender_ids or not _is_sqlite(db):
+        return
+    db.execute(text("DELETE FROM tender_search WHERE rowid = :rowid"), [{"rowid": tender_id} for tender_id in tender_ids])
+
+
+def build_match_query(q: str):
+    """
+    Turns free text into an FTS5 query: every term must match, the last one as
+    a prefix (search-as-you-type). Terms are quoted so user input can never be
+    FTS5 syntax. Returns None when there is nothing to search for.
+    """
+    terms = [term.replace('"', '""') for term in q.split()]
+    terms = [term for term in terms if term.strip('"')]
+    if not terms:
+        return None
+    return " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+
+def search(db: Session, q: str, limit: int = 20, offset: int = 0):
+    """Ranked hits for q as dicts: id, bid_number, subject, nickname, bid_end_date, rank, highlights, snippet"""
+    match = build_match_query(q)
+    if match is None:
+        return []
+    if not _is_sqlite(db):
+        return _search_fields(db, q, limit, offset)
+
+    # Rank first and only highlight the page being returned
+    top = db.execute(
+        text("SELECT rowid, rank FROM tender_search WHERE tender_search MATCH :match ORDER BY rank LIMIT :limit OFFSET :offset"),
+        {"match": match, "limit": limit, "offset": offset}
+    ).all()
+    if not top:
+        return []
+    ranks = {row.rowid: row.rank for row in top}
+
+    highlights = ", ".join(
+        f"highlight(tender_search, {i}, '{MARK_START}', '{MARK_END}') AS marked_{column}" for i, column in enumerate(FIELD_COLUMNS)
+    )
+    rows = db.execute(
+        text(f"""
+            SELECT tenders.id, tenders.bid_number, tenders.subject, tenders.nickname, tenders.bid_end_date, {highlights},
+                   snippet(tender_search, {len(FIELD_COLUMNS)}, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS}) AS snippet
+            FROM tender_search JOIN tenders ON tenders.id = tender_search.rowid
+            WHERE tender_search MATCH :match AND tender_search.rowid IN ({', '.join(str(rowid) for rowid in ranks)})
+        """),
+        {"match": match}
+    ).mappings().all()
+
+    hits = []
+    for row in rows:
+        marked = {column: row[f"marked_{column}"] for column in FIELD_COLUMNS if MARK_START in (row[f"marked_{column}"] or "")}
+        hits.append({
+            "id": row["id"],
+            "bid_number": row["bid_number"],
+            "subject": row["subject"],
+            "nickname": row["nickname"],
+            "bid_end_date": row["bid_end_date"],
+            "rank": -ranks[row["id"]],
+            "highlights": marked,
+            "snippet": row["snippet"] if row["snippet"] and MARK_START in row["snippet"] else None,
+        })
+    return sorted(hits, key=lambda hit: -hit["rank"])
+
+
+def _search_fields(db: Session, q: str, limit: int, offset: int):
+    """Unranked fallback without FTS5: every term must appear in one of the fields"""
+    columns = [getattr(Tender, column) for column in FIELD_COLUMNS]
+    terms = [term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") for term in q.split()]
+    conditions = [or_(*[column.ilike(f"%{term}%", escape="\\") for column in columns]) for term in terms]
+    tenders = db.query(Tender).filter(and_(*conditions)).order_by(Tender.bid_end_date.desc(), Tender.id)\
+        .offset(offset).limit(limit).all()
+    return [
+        {"id": tender.id, "bid_number": tender.bid_number, "subject": tender.subject, "nickname": tender.nickname,
+         "bid_end_date": tender.bid_end_date, "rank": 0.0, "highlights": {}, "snippet": None}
+        for tender in tenders
+    ]
@@ -0,0 +1,122 @@
+"""
+Signed URLs
+Supabase Storage signed download URLs, cached until shortly before they
+expire so repeated clicks on the same file cost no Storage round trip, and
+signed in bulk (one create_signed_urls call per bucket) for list views.
+Callers check access before asking for a URL; the cache only saves signing.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from .supabase_client import run
+
+load_dotenv()
+
+# Lifetime of new signed URLs in seconds. Kept short because a leaked URL, or
+# one held by a user who has since lost access, works until it expires; raise
+# it per bucket with SIGNED_URL_TTL_<BUCKET>, e.g. SIGNED_URL_TTL_TENDER_PDFS=900
+SIGNED_URL_TTL = int(os.getenv("SIGNED_URL_TTL", "300"))
+# Cached URLs are replaced this many seconds (at most half the TTL) before
+# they expire, so a client always has that long left to use one
+SIGNED_URL_MIN_REMAINING = int(os.getenv("SIGNED_URL_MIN_REMAINING", "60"))
+SIGNED_URL_CACHE_MAX_ENTRIES = int(os.getenv("SIGNED_URL_CACHE_MAX_ENTRIES", "4096"))
+
+_urls = OrderedDict()  # (bucket, path, ttl) -> (fresh until, url)
+_lock = threading.Lock()
+
+
+def ttl_for(bucket: str) -> int:
+    """Signed URL lifetime for a bucket"""
+    return int(os.getenv(f"SIGNED_URL_TTL_{bucket.upper().replace('-', '_')}", SIGNED_URL_TTL))
+
+
+def _get(key):
+    with _lock:
+        entry = _urls.get(key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del _urls[key]
+            return None
+        _urls.move_to_end(key)
+        return entry[1]
+
+
+def _set(key, url: str, signed_at: float):
+    ttl = key[2]
+    # Short-lived URLs are still reused for the first half of their life
+    fresh_until = signed_at + ttl - min(SIGNED_URL_MIN_REMAINING, ttl // 2)
+    with _lock:
+        _urls[key] = (fresh_until, url)
+        _urls.move_to_end(key)
+        while len(_urls) > SIGNED_URL_CACHE_MAX_ENTRIES:
+            _urls.popitem(last=False)
+
+
+def invalidate(bucket: str, path: str):
+    """Forgets every cached URL of a file (e.g. after it is deleted or replaced)"""
+    with _lock:
+        for key in [key for key in _urls if key[0] == bucket and key[1] == path]:
+            del _urls[key]
+
+
+def clear():
+    with _lock:
+        _urls.clear()
+
+
+async def sign(client, bucket: str, path: str, ttl: int = None) -> str:
+    """Signed URL of one file, from the cache when it has enough time left"""
+    ttl = ttl or ttl_for(bucket)
+    key = (bucket, path, ttl)
+    url = _get(key)
+    if url:
+        return url
+    signed_at = time.monotonic()
+    result = await run(client.storage.from_(bucket).create_signed_url, path, ttl)
+    _set(key, result["signedURL"], signed_at)
+    return result["signedURL"]
+
+
+async def sign_many(client, bucket: str, paths: list, ttl: int = None) -> dict:
+    """
+    Signed URLs for several files of one bucket: {path: url}. Cache misses are
+    signed in one create_signed_urls call; files Storage cannot sign map to None.
+    """
+    ttl = ttl or ttl_for(bucket)
+    urls, missing = {}, []
+    for path in dict.fromkeys(paths):
+        urls[path] = _get((bucket, path, ttl))
+        if urls[path] is None:
+            missing.append(path)
+    if not missing:
+        return urls
+
+    signed_at = time.monotonic()
+    try:
+        results = await run(client.storage.from_(bucket).create_signed_urls, missing, ttl)
+    except Exception as e:
+        # One missing object can fail the whole batch; sign the rest one by one
+        print(f"DEBUG: Batch signing of {len(missing)} files failed, signing individually: {e}")
+        results = await asyncio.gather(
+            *(_sign_or_none(client, bucket, path, ttl) for path in missing)
+        )
+        results = [{"path": path, "signedURL": url} for path, url in zip(missing, results)]
+
+    for result in results:
+        path, url = result.get("path"), result.get("signedURL")
+        if path in urls and url and not result.get("error"):
+            urls[path] = url
+            _set((bucket, path, ttl), url, signed_at)
+    return urls
+
+
+async def _sign_or_none(client, bucket: str, path: str, ttl: int):
+    try:
+        return await sign(client, bucket, path, ttl)
+    except Exception as e:
+        print(f"DEBUG: Could not sign {bucket}/{path}: {e}")
+        return None
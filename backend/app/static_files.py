@@ -0,0 +1,170 @@
+"""
+Static Frontend Files
+In-memory manifest of the exported frontend in backend/static, built once at
+startup: every file's bytes, ETag, media type, cache policy and gzip/brotli
+variants. Requests are answered from the manifest (including 304s) without
+touching the disk. Restart the server after replacing the static build
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # gzip variants only
+    brotli = None
+
+# Next.js puts content-hashed chunks under _next/static; they never change under the same URL
+IMMUTABLE_PREFIX = "_next/static/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Everything else (HTML, RSC payloads) may change with a deploy: revalidate with the ETag
+REVALIDATE_CACHE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 512  # bytes
+# Larger files are streamed from disk instead of held in memory
+MAX_MEMORY_FILE = 8 * 1024 * 1024
+
+ENCODINGS = ("br", "gzip")
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+mimetypes.add_type("font/woff2", ".woff2")
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/json", ".map")
+
+
+class Asset:
+    __slots__ = ("path", "body", "size", "media_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path, body, size, media_type, etag, cache_control, variants):
+        self.path = path  # on disk, for files too large to keep in memory
+        self.body = body
+        self.size = size
+        self.media_type = media_type
+        self.etag = etag  # content hash; each encoding gets its own ETag derived from it
+        self.cache_control = cache_control
+        self.variants = variants  # encoding -> compressed bytes
+
+
+def _compressible(media_type: str, size: int) -> bool:
+    return size >= MIN_COMPRESS_SIZE and media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _load_asset(static_dir: str, name: str) -> Asset:
+    path = os.path.join(static_dir, name)
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    cache_control = IMMUTABLE_CACHE if name.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE
+
+    size = os.path.getsize(path)
+    if size > MAX_MEMORY_FILE:
+        digest = hashlib.blake2b(f"{name}:{size}:{os.path.getmtime(path)}".encode(), digest_size=12).hexdigest()
+        return Asset(path, None, size, media_type, digest, cache_control, {})
+
+    with open(path, "rb") as f:
+        body = f.read()
+    variants = {}
+    if _compressible(media_type, size):
+        # Prefer variants written by the build (build_deploy.py), else gzip now
+        for encoding in ENCODINGS:
+            if os.path.isfile(path + SUFFIXES[encoding]):
+                with open(path + SUFFIXES[encoding], "rb") as f:
+                    variants[encoding] = f.read()
+        if "gzip" not in variants:
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        variants = {encoding: data for encoding, data in variants.items() if len(data) < size}
+    return Asset(None, body, size, media_type, hashlib.blake2b(body, digest_size=12).hexdigest(), cache_control, variants)
+
+
+def load(static_dir: str) -> dict:
+    """Builds the manifest: relative URL path -> Asset. Empty if the directory is missing"""
+    manifest = {}
+    if not os.path.isdir(static_dir):
+        return manifest
+    for root, _, files in os.walk(static_dir):
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, "/")
+            # Precompressed siblings are variants of their original, not URLs of their own
+            if name.endswith(tuple(SUFFIXES.values())) and os.path.isfile(os.path.join(static_dir, name.rsplit(".", 1)[0])):
+                continue
+            manifest[name] = _load_asset(static_dir, name)
+    return manifest
+
+
+def precompress(static_dir: str):
+    """Writes .gz (and .br when brotli is installed) next to every compressible file, for build_deploy.py"""
+    written = 0
+    for name, asset in load(static_dir).items():
+        if asset.body is None or not _compressible(asset.media_type, asset.size):
+            continue
+        path = os.path.join(static_dir, name)
+        outputs = {"gzip": gzip.compress(asset.body, compresslevel=9, mtime=0)}
+        if brotli:
+            outputs["br"] = brotli.compress(asset.body, quality=11)
+        for encoding, data in outputs.items():
+            if len(data) < asset.size:
+                with open(path + SUFFIXES[encoding], "wb") as f:
+                    f.write(data)
+                written += 1
+    return written
+
+
+def _accepted_encodings(accept_encoding: str):
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.strip()
+        try:
+            if params.startswith("q=") and float(params[2:]) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip())
+    return accepted
+
+
+def _etag(asset: Asset, encoding: str = None) -> str:
+    return f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+
+
+def _etag_matches(if_none_match: str, asset: Asset) -> bool:
+    """True if the client holds any encoding of the current content (proxies may weaken the tag)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == "*" or tag.split("-")[0] == asset.etag:
+            return True
+    return False
+
+
+def respond(manifest: dict, full_path: str, request_headers) -> Response:
+    """
+    Serves full_path from the manifest; unknown paths get index.html for SPA
+    routing, except under _next/ where a missing chunk is a 404
+    """
+    asset = manifest.get(full_path)
+    if asset is None:
+        if full_path.startswith("_next/"):
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+        asset = manifest.get("index.html")
+        if asset is None:
+            return JSONResponse({"error": "Frontend not found"}, status_code=404)
+
+    headers = {"ETag": _etag(asset), "Cache-Control": asset.cache_control}
+    if asset.variants:
+        headers["Vary"] = "Accept-Encoding"
+    if _etag_matches(request_headers.get("if-none-match"), asset):
+        return Response(status_code=304, headers=headers)
+
+    if asset.body is None:
+        return FileResponse(asset.path, media_type=asset.media_type, headers=headers)
+
+    accepted = _accepted_encodings(request_headers.get("accept-encoding"))
+    for encoding in ENCODINGS:
+        if encoding in asset.variants and encoding in accepted:
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = _etag(asset, encoding)
+            return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
+    return Response(content=asset.body, media_type=asset.media_type, headers=headers)
@@ -2,7 +2,10 @@
 Supabase Client Configuration
 Initializes Supabase client for backend API operations
 """
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -15,9 +18,25 @@ SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Use service key for
 if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
     raise ValueError("Missing Supabase credentials. Check your .env file.")
 
+# Upper bound on Supabase calls in flight at once from this process
+SUPABASE_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "16"))
+
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
 def get_supabase_client() -> Client:
     """Returns the Supabase client instance"""
     return supabase
+
+# The supabase client is synchronous; every call goes through this dedicated
+# pool so a slow PostgREST/storage round trip never blocks the event loop
+_executor = ThreadPoolExecutor(max_workers=SUPABASE_MAX_CONCURRENCY, thread_name_prefix="supabase")
+
+async def run(fn, *args, **kwargs):
+    """Runs a blocking Supabase call (auth, storage, ...) on the Supabase thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+async def execute(query):
+    """Awaits a PostgREST query builder: `await execute(client.table(...).select(...))`"""
+    return await run(query.execute)
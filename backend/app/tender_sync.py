@@ -0,0 +1,97 @@
+"""
+Tender Sync
+Versioning and delta queries behind GET /api/tenders/: the company's sync
+version doubles as the ETag and the ?since= cursor, and a delta holds only
+the tenders, checklist items and tombstones that changed after a cursor
+"""
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+from .supabase_client import execute
+
+# Tombstones are kept this long (see supabase/add_tender_sync.sql); older cursors get a full list
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+# Version of a company with no writes since add_tender_sync.sql ran
+EMPTY_VERSION = "0"
+_NEVER = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(version: str) -> str:
+    return base64.urlsafe_b64encode(version.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """
+    (sync version, time it was reached) behind a cursor; raises ValueError
+    for anything malformed. Cursors from before sync versions (a bare
+    timestamp) decode as too old, so the client gets a full list.
+    """
+    version = base64.urlsafe_b64decode(cursor.encode()).decode()
+    if version == EMPTY_VERSION:
+        return 0, None
+    if "@" not in version:
+        datetime.fromisoformat(version)
+        return 0, _NEVER
+    number, changed_at = version.split("@", 1)
+    return int(number), datetime.fromtimestamp(float(changed_at), timezone.utc)
+
+
+def etag(version: str) -> str:
+    return f'"{encode_cursor(version)}"'
+
+
+def etag_matches(if_none_match: str, version: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag(version) in tags
+
+
+async def get_version(client, company_id: str) -> str:
+    """The company's sync version ('<counter>@<epoch seconds>'), bumped by every tender/checklist write or delete"""
+    response = await execute(client.rpc("tender_sync_version", {"p_company_id": company_id}))
+    return response.data or EMPTY_VERSION
+
+
+def is_expired(changed_at: datetime) -> bool:
+    """True when tombstones written after changed_at may already be gone, so a delta could miss deletes"""
+    return changed_at is not None and changed_at < datetime.now(timezone.utc) - TOMBSTONE_RETENTION
+
+
+async def fetch_changes(client, company_id: str, since: int) -> dict:
+    """Tenders, checklist items and tombstones stamped with a sync version above since"""
+    tenders, items, deleted = await asyncio.gather(
+        execute(
+            client.table("tenders")
+                .select("*, checklist_items(*)")
+                .eq("company_id", company_id)
+                .gt("sync_version", since)
+                .order("bid_end_date", desc=False)
+        ),
+        execute(
+            client.table("checklist_items")
+                .select("*")
+                .eq("company_id", company_id)
+                .gt("sync_version", since)
+        ),
+        execute(
+            client.table("deleted_records")
+                .select("table_name, record_id")
+                .eq("company_id", company_id)
+                .gt("sync_version", since)
+        ),
+    )
+
+    # Items of tenders that are re-sent anyway already travel nested inside them
+    changed_tenders = {tender["id"] for tender in tenders.data}
+    checklist_items = []
+    for item in items.data:
+        if item["tender_id"] not in changed_tenders:
+            checklist_items.append(item)
+
+    removed = {"tenders": [], "checklist_items": []}
+    for row in deleted.data:
+        removed.setdefault(row["table_name"], []).append(row["record_id"])
+
+    return {"tenders": tenders.data, "checklist_items": checklist_items, "deleted": removed}
@@ -1,80 +1,122 @@
 import google.generativeai as genai
+import io
+import mmap
 import os
 import json
-import re
 import pdfplumber
-from datetime import datetime
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from . import gemini, extractor
 
 load_dotenv()
 
-def extract_pdf_details(pdf_path: str):
+HEADER_FIELDS = ("bid_number", "bid_end_date", "item_category")
+# Pages of text kept per PDF for full-text search (0 disables it)
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "20"))
+
+def _match_fields(text: str, details: dict):
+    """Fill any missing header fields in details from a block of PDF text"""
+    missing = [field for field in extractor.FIELDS if not details.get(field)]
+    if missing:
+        details.update(extractor.extract_fields(text, missing))
+
+def _words_to_text(words: list, tolerance: float = 3):
+    """Rebuild reading-order lines from pdfplumber word boxes"""
+    lines = []
+    current_top = None
+    for word in sorted(words, key=lambda w: w["top"]):
+        if current_top is None or word["top"] - current_top > tolerance:
+            lines.append([])
+            current_top = word["top"]
+        lines[-1].append(word)
+    return "\n".join(" ".join(w["text"] for w in sorted(line, key=lambda w: w["x0"])) for line in lines)
+
+@contextmanager
+def open_pdf(pdf_source, **kwargs):
     """
-    Extract bid details from PDF using fast regex matching with AI fallback.
+    Open a PDF from in-memory bytes or a file path. Files are memory-mapped
+    so pdfminer's many small seeks/reads don't go through buffered I/O.
+    """
+    if isinstance(pdf_source, (bytes, bytearray)):
+        with pdfplumber.open(io.BytesIO(pdf_source), **kwargs) as pdf:
+            yield pdf
+        return
+
+    with open(pdf_source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("PDF file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with pdfplumber.open(mapped, **kwargs) as pdf:
+                yield pdf
+
+def _header_text(pdf):
+    return _words_to_text(pdf.pages[0].extract_words()) if pdf.pages else ""
+
+def scan_header_page(pdf_source, details: dict):
+    """
+    Fast path: read only the word boxes of page 1, where the GeM bid
+    header table lives. Returns the text that was scanned.
     """
-    details = {
-        "bid_number": None,
-        "bid_end_date": None,
-        "item_category": None,
-        "subject": None
-    }
-
-    # 1. FAST REGEX SCAN (Directly read first 2 pages)
+    with open_pdf(pdf_source, pages=[1]) as pdf:
+        text = _header_text(pdf)
+    _match_fields(text, details)
+    return text
+
+def scan_full_text(pdf_source, details: dict):
+    """Slow path: full-page extract_text over the first two pages"""
+    text = ""
+    with open_pdf(pdf_source) as pdf:
+        for i in range(min(2, len(pdf.pages))):
+            page_text = pdf.pages[i].extract_text()
+            if page_text:
+                text += page_text + "\n"
+    if text:
+        _match_fields(text, details)
+    return text
+
+def parse_pdf_details(pdf_source):
+    """
+    Regex-only extraction. Returns (details, text) where text is what the
+    scan read, for the Gemini fallback when the bid number is still missing.
+    """
+    details = dict.fromkeys(extractor.FIELDS)
+    details["subject"] = None
+
+    # FAST REGEX SCAN (page 1 header, then first 2 pages only if a field is missing)
     text = ""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for i in range(min(2, len(pdf.pages))):
-                page_text = pdf.pages[i].extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            
-            if text:
-                bid_no_match = re.search(r"Bid Number(?:\s*/\s*िबड संख्या)?\s*[:\.]?\s*(GEM/\d{4}/[A-Z]/\d+)", text, re.IGNORECASE)
-                if bid_no_match:
-                    details["bid_number"] = bid_no_match.group(1).strip()
-
-                end_date_match = re.search(r"Bid End Date/Time(?:\s*/\s*िबड समाप्ति तिथि/समय)?\s*(\d{2}-\d{2}-\d{4}\s*\d{2}:\d{2}:\d{2})", text, re.IGNORECASE)
-                if end_date_match:
-                    try:
-                        details["bid_end_date"] = datetime.strptime(end_date_match.group(1), "%d-%m-%Y %H:%M:%S")
-                    except:
-                        pass
-
-                item_cat_match = re.search(r"Item Category(?:\s*/\s*मद श्रेणी)?\s*(.*)", text, re.IGNORECASE)
-                if item_cat_match:
-                    details["item_category"] = item_cat_match.group(1).strip()
+        text = scan_header_page(pdf_source, details)
     except Exception as e:
-        print(f"DEBUG: Fast regex scan failed: {e}")
-
-    dynamic_api_key = os.getenv("GOOGLE_API_KEY")
-    if not details.get("bid_number") and dynamic_api_key:
+        print(f"DEBUG: Header scan failed: {e}")
+    if not all(details[field] for field in HEADER_FIELDS):
         try:
-            print("DEBUG: Regex missed Bid Number. Attempting AI extraction with Gemini...")
-            genai.configure(api_key=dynamic_api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash') 
-            
-            prompt = f"""
-            Extract GeM Bid Number, End Date (DD-MM-YYYY HH:MM:SS), and Item Category.
-            Return ONLY clean JSON.
-            Text: {text[:5000]}
-            """
-
-            response = model.generate_content(prompt)
-            json_text = response.text.replace('```json', '').replace('```', '').strip()
-            ai_data = json.loads(json_text)
-            
-            if not details["bid_number"]: details["bid_number"] = ai_data.get("bid_number")
-            if not details["item_category"]: details["item_category"] = ai_data.get("item_category")
-            if not details["bid_end_date"] and ai_data.get("bid_end_date"):
-                try:
-                    details["bid_end_date"] = datetime.strptime(ai_data["bid_end_date"], "%d-%m-%Y %H:%M:%S")
-                except:
-                    pass
+            text = scan_full_text(pdf_source, details) or text
         except Exception as e:
-            print(f"DEBUG: AI fallback failed: {e}")
+            print(f"DEBUG: Fast regex scan failed: {e}")
+    return details, text
 
+def read_page_text(pdf_source) -> str:
+    """
+    Text of the first SEARCH_MAX_PAGES pages for the search index. Kept out
+    of parse_pdf_details so uploads only pay for it when indexing runs;
+    a page that fails to extract is left out rather than failing the rest.
+    """
+    if SEARCH_MAX_PAGES <= 0:
+        return ""
+    pages = []
+    with open_pdf(pdf_source, pages=list(range(1, SEARCH_MAX_PAGES + 1))) as pdf:
+        for page in pdf.pages:
+            try:
+                pages.append(page.extract_text() or "")
+            except Exception as e:
+                print(f"DEBUG: Could not read text of page {page.page_number}: {e}")
+    # Postgres text columns reject NUL characters
+    return "\n".join(pages).replace("\x00", "")
+
+def finish_details(details: dict, pdf_source=None, filename: str = None):
+    """Filename fallback for the bid number and the short subject, after regex and AI"""
     if not details["bid_number"]:
-        filename = os.path.basename(pdf_path)
+        filename = filename or (os.path.basename(pdf_source) if isinstance(pdf_source, str) else "")
         if filename.startswith("GEM"):
             details["bid_number"] = filename.split('.')[0]
 
@@ -84,6 +126,22 @@ def extract_pdf_details(pdf_path: str):
 
     return details
 
+def extract_pdf_details(pdf_source, filename: str = None, ai_fallback: bool = True, finish: bool = True):
+    """
+    Extract bid details from PDF using fast regex matching with AI fallback.
+    pdf_source is a file path or the PDF bytes; filename is used for the
+    GEM... filename fallback when the source is in memory. finish=False
+    skips finish_details, leaving only what the PDF itself yielded (what
+    the extraction cache stores).
+    """
+    details, text = parse_pdf_details(pdf_source)
+
+    if ai_fallback and not details["bid_number"] and gemini.is_enabled():
+        print("DEBUG: Regex missed Bid Number. Attempting AI extraction with Gemini...")
+        gemini.apply_fields(details, gemini.extract_fields(text))
+
+    return finish_details(details, pdf_source, filename) if finish else details
+
 def extract_details_from_image(image_bytes: bytes, mime_type: str = "image/png"):
     """
     Extract bid details from a GeM portal screenshot using Gemini AI.
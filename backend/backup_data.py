@@ -1,55 +1,82 @@
-import shutil
+"""
+Backup and Restore
+Incremental backups of gemtracker.db and uploads/ (see app/backup.py).
+Safe to run while the server is up; each run stores only new database
+chunks and new uploads.
+
+Usage:
+    python backup_data.py                          # new snapshot in backend/backups
+    python backup_data.py --keep 14                # ...then drop all but the newest 14
+    python backup_data.py --list
+    python backup_data.py --restore [SNAPSHOT] --target DIR [--force]
+"""
+import argparse
 import os
-import datetime
-
-def backup_data():
-    # Define paths (assuming this script is in GEMtracker/backend/)
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    db_file = os.path.join(base_dir, 'gemtracker.db')
-    uploads_dir = os.path.join(base_dir, 'uploads')
-    
-    # Create backups directory if it doesn't exist
-    backups_base = os.path.join(base_dir, 'backups')
-    if not os.path.exists(backups_base):
-        os.makedirs(backups_base)
-        print(f"Created backups directory: {backups_base}")
-
-    # Create timestamped folder for this backup
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_folder = os.path.join(backups_base, f"backup_{timestamp}")
-    os.makedirs(backup_folder)
-    print(f"Created backup folder: {backup_folder}")
-
-    # Backup Database using VACUUM INTO for safer online backup
-    if os.path.exists(db_file):
-        dst_db = os.path.join(backup_folder, 'gemtracker.db')
-        try:
-            import sqlite3
-            conn = sqlite3.connect(db_file)
-            conn.execute(f"VACUUM INTO '{dst_db}'")
-            conn.close()
-            print(f"Database backed up (VACUUM INTO) to: {dst_db}")
-        except Exception as e:
-            print(f"Error backing up database with VACUUM INTO: {e}")
-            print("Falling back to file copy...")
-            try:
-                shutil.copy2(db_file, dst_db)
-                print(f"Database backed up (copy) to: {dst_db}")
-            except Exception as copy_e:
-                print(f"Error copying database file: {copy_e}")
-    else:
-        print(f"Warning: Database file not found at {db_file}")
+import sys
 
-    # Backup Uploads
-    if os.path.exists(uploads_dir):
-        dst_uploads = os.path.join(backup_folder, 'uploads')
-        shutil.copytree(uploads_dir, dst_uploads)
-        print(f"Uploads backed up to: {dst_uploads}")
-    else:
-        print(f"Warning: Uploads directory not found at {uploads_dir}")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import backup
+
+# Define paths (assuming this script is in GEMtracker/backend/)
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _size(count: int) -> str:
+    return f"{count / (1024 * 1024):.1f} MB"
+
+
+def _progress(copied: int, total: int):
+    print(f"\rDatabase: {copied}/{total} pages", end="", flush=True)
+
+
+def backup_data(db_file: str, uploads_dir: str, backups_dir: str, keep: int = None):
+    manifest = backup.create_snapshot(db_file, uploads_dir, backups_dir, progress=_progress)
+    print()
+    stats = manifest["stats"]
+    database = manifest["database"]
+    if database:
+        print(f"Database: {_size(database['size'])} in {len(database['chunks'])} chunks")
+    print(f"Uploads: {len(manifest['uploads'])} files")
+    print(f"Stored {stats['objects_written']} new objects ({_size(stats['bytes_written'])}), reused {stats['reused']}")
+
+    if keep:
+        removed = backup.prune(keep, backups_dir)
+        print(f"Pruned {removed['snapshots']} snapshots and {removed['objects']} objects ({_size(removed['bytes'])})")
 
     print("\nBackup completed successfully!")
-    print(f"Location: {backup_folder}")
+    print(f"Snapshot: {manifest['name']} in {backups_dir}")
+
+
+def list_backups(backups_dir: str):
+    for name in backup.list_snapshots(backups_dir):
+        manifest = backup.load_manifest(backups_dir, name)
+        size = manifest["database"]["size"] if manifest["database"] else 0
+        print(f"{name:<20}  db {_size(size):>10}  {len(manifest['uploads']):>6} uploads")
+
 
 if __name__ == "__main__":
-    backup_data()
+    parser = argparse.ArgumentParser(description="GEMtracker backups")
+    parser.add_argument("--db", default=os.path.join(base_dir, "gemtracker.db"))
+    parser.add_argument("--uploads", default=os.path.join(base_dir, "uploads"))
+    parser.add_argument("--dest", default=os.path.join(base_dir, "backups"), help="backup store")
+    parser.add_argument("--keep", type=int, help="snapshots to keep after backing up")
+    parser.add_argument("--list", action="store_true", help="list snapshots")
+    parser.add_argument("--restore", nargs="?", const="", metavar="SNAPSHOT", help="restore a snapshot (default: latest)")
+    parser.add_argument("--target", help="directory to restore into")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing database/uploads when restoring")
+    args = parser.parse_args()
+
+    if args.list:
+        list_backups(args.dest)
+    elif args.restore is not None:
+        if not args.target:
+            parser.error("--restore needs --target")
+        try:
+            manifest = backup.restore(args.target, args.dest, args.restore or None, force=args.force)
+        except (FileNotFoundError, FileExistsError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Restored snapshot {manifest['name']} into {args.target}")
+    else:
+        backup_data(args.db, args.uploads, args.dest, args.keep)
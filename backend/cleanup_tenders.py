@@ -0,0 +1,54 @@
+"""
+Expired Tender Cleanup
+Deletes tenders that closed more than CLEANUP_RETENTION_DAYS (default 10)
+ago, with their checklists and PDFs (see app/maintenance.py). Safe to
+interrupt and re-run.
+
+Usage:
+    python cleanup_tenders.py                 # local database (DATABASE_URL or gemtracker.db) and uploads/
+    python cleanup_tenders.py --supabase      # Supabase project from .env (service key)
+    python cleanup_tenders.py --days 30 --batch-size 200 --dry-run
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import maintenance
+
+
+def _progress(stats: dict):
+    print(f"\rPage {stats['pages']}: {stats['tenders']} tenders, {stats['files']} files", end="", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired GEMtracker tenders")
+    parser.add_argument("--supabase", action="store_true", help="clean up the Supabase project instead of the local database")
+    parser.add_argument("--days", type=float, default=None, help="days after the bid end date to keep a tender")
+    parser.add_argument("--batch-size", type=int, default=None, help="tenders per page")
+    parser.add_argument("--dry-run", action="store_true", help="count what would be deleted")
+    args = parser.parse_args()
+
+    before = maintenance.cutoff(args.days)
+    print(f"{'Counting' if args.dry_run else 'Deleting'} tenders that closed before {before.isoformat(timespec='seconds')}")
+
+    if args.supabase:
+        from app.supabase_client import get_supabase_client
+        stats = asyncio.run(maintenance.cleanup_supabase(
+            get_supabase_client(), before, args.batch_size, args.dry_run, _progress
+        ))
+    else:
+        from app import database
+        db = database.SessionLocal()
+        try:
+            stats = maintenance.cleanup_database(db, before, args.batch_size, args.dry_run, _progress)
+        finally:
+            db.close()
+
+    print()
+    print(f"{'Would delete' if args.dry_run else 'Deleted'} {stats['tenders']} tenders and {stats['files']} files "
+          f"in {stats['pages']} pages, {stats['seconds']}s ({stats['tenders_per_second']} tenders/s)")
+    if stats["failed_files"]:
+        print(f"Warning: {stats['failed_files']} files could not be removed; their tenders were kept for the next run")
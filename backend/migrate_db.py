@@ -1,24 +1,54 @@
-import sqlite3
+"""
+Database Migrations
+Applies pending schema migrations (app/migrations.py) to DATABASE_URL, or the
+local gemtracker.db. The server also runs them on startup.
+
+Usage:
+    python migrate_db.py            # apply pending migrations
+    python migrate_db.py --status   # list migrations and when they were applied
+    python migrate_db.py --check    # EXPLAIN the hot queries; exit 1 if one misses its index
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import database, models, migrations
+
 
 def migrate():
-    conn = sqlite3.connect('gemtracker.db')
-    cursor = conn.cursor()
+    models.Base.metadata.create_all(bind=database.engine)
+    applied = migrations.run(database.engine)
+    if not applied:
+        print("Database is up to date.")
 
-    try:
-        cursor.execute("ALTER TABLE tenders ADD COLUMN nickname VARCHAR")
-        conn.commit()
-        print("Added nickname column.")
-    except sqlite3.OperationalError:
-        print("Nickname column already exists.")
 
-    try:
-        cursor.execute("ALTER TABLE tenders ADD COLUMN file_path VARCHAR")
-        conn.commit()
-        print("Added file_path column.")
-    except sqlite3.OperationalError:
-        print("File_path column already exists.")
+def show_status():
+    for version, name, applied_at in migrations.status(database.engine):
+        print(f"{version:>4}  {applied_at.isoformat(timespec='seconds') if applied_at else 'pending':<19}  {name}")
+
+
+def check():
+    ok = True
+    for label, index, plan, uses_index in migrations.check_query_plans(database.engine):
+        print(f"{'OK  ' if uses_index else 'MISS'}  {label} ({index})")
+        if not uses_index:
+            ok = False
+            for line in plan.splitlines():
+                print(f"        {line}")
+    return ok
 
-    conn.close()
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description="GEMtracker schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    parser.add_argument("--check", action="store_true", help="verify the hot queries use their indexes")
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+    else:
+        migrate()
+        if args.check and not check():
+            sys.exit(1)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests import the backend's app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The Supabase client is created at import time; tests hand modules a fake
+# client, so placeholder credentials are enough and nothing is contacted
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
@@ -0,0 +1,102 @@
+"""
+Gemini fallback against a local fake model: batching, ordering, caching
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+import pytest
+from app import gemini, jobs
+
+
+class FakeModel:
+    """Answers with the bid number found in the prompt, after a random delay"""
+
+    def __init__(self, fail_on=()):
+        self.prompts = []
+        self.fail_on = fail_on
+        self.rng = random.Random(3)
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        time.sleep(self.rng.uniform(0, 0.02))
+        bid_number = next(word for word in prompt.split() if word.startswith("GEM/"))
+        if bid_number in self.fail_on:
+            raise RuntimeError("quota exceeded")
+
+        class Response:
+            text = "```json\n" + json.dumps({"bid_number": bid_number, "item_category": "Chairs"}) + "\n```"
+        return Response()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(gemini, "GEMINI_REQUESTS_PER_MINUTE", 0)
+    fake = FakeModel(fail_on=("GEM/2026/B/13",))
+    gemini.set_model(fake)
+    yield fake
+    gemini.set_model(None)
+
+
+def _texts(numbers):
+    return [f"Scanned bid GEM/2026/B/{number} without a readable header" for number in numbers]
+
+
+def test_batch_keeps_input_order_and_sends_duplicates_once(model):
+    texts = _texts([5, 1, 4, 1, 3, 2, 5])
+    results = asyncio.run(gemini.extract_fields_batch(texts))
+
+    assert [result["bid_number"] for result in results] == [f"GEM/2026/B/{n}" for n in (5, 1, 4, 1, 3, 2, 5)]
+    assert len(model.prompts) == 5
+
+
+def test_batch_reuses_cached_responses(model):
+    asyncio.run(gemini.extract_fields_batch(_texts([1, 2])))
+    results = asyncio.run(gemini.extract_fields_batch(_texts([2, 3, 1])))
+
+    assert [result["bid_number"] for result in results] == ["GEM/2026/B/2", "GEM/2026/B/3", "GEM/2026/B/1"]
+    assert len(model.prompts) == 3
+    # The single-text path shares the cache
+    assert gemini.extract_fields(_texts([3])[0])["bid_number"] == "GEM/2026/B/3"
+    assert len(model.prompts) == 3
+
+
+def test_batch_failure_is_none_and_not_cached(model):
+    results = asyncio.run(gemini.extract_fields_batch(_texts([12, 13, 14])))
+
+    assert results[1] is None
+    assert [results[0]["bid_number"], results[2]["bid_number"]] == ["GEM/2026/B/12", "GEM/2026/B/14"]
+    asyncio.run(gemini.extract_fields_batch(_texts([13])))
+    assert len(model.prompts) == 4
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+
+
+def test_fits_budget_counts_rate_slots_but_not_cache_hits(model, monkeypatch, jobs_db):
+    asyncio.run(gemini.extract_fields_batch(_texts([1])))
+    monkeypatch.setattr(gemini, "GEMINI_REQUESTS_PER_MINUTE", 6)  # one slot per 10s
+
+    fits = gemini.fits_budget(_texts([1, 2, 3, 2, 4, 5]), budget=15)
+
+    # Cached 1 always fits; 2 and 3 take the two slots starting within 15s (2 again is free)
+    assert fits == [True, True, True, True, False, False]
+
+
+def test_rate_limit_is_shared_across_processes(jobs_db, monkeypatch):
+    monkeypatch.setattr(gemini, "GEMINI_REQUESTS_PER_MINUTE", 6)
+    # A job worker process books the next slot in the jobs database
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        assert pool.apply(_reserve_in_worker, (jobs.JOBS_DB_PATH,)) == 0
+    # so this process waits a full interval, and the budget has one slot fewer
+    assert gemini.fits_budget(_texts([21, 22]), budget=15) == [True, False]
+    assert 9 < gemini._reserve_slot() <= 10
+
+
+def _reserve_in_worker(jobs_db_path):
+    jobs.JOBS_DB_PATH = jobs_db_path
+    gemini.GEMINI_REQUESTS_PER_MINUTE = 6
+    return gemini._reserve_slot()
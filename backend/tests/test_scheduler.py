@@ -0,0 +1,120 @@
+"""
+Deadline heap against an in-memory tenders table: re-timing, reminders,
+and a failed expire UPDATE retried across polls
+"""
+import asyncio
+import pytest
+from app import scheduler
+
+
+class FakeQuery:
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+        self.update_values = None
+
+    def update(self, values):
+        self.update_values = values
+        return self
+
+    def __getattr__(self, name):
+        # select/eq/gt/order/range/... narrow nothing: every active row is returned
+        return lambda *args, **kwargs: self
+
+    @property
+    def not_(self):
+        return self
+
+    def execute(self):
+        if self.update_values is not None:
+            self.table.updates.append(self.update_values)
+            if self.table.fail_updates:
+                raise RuntimeError("connection reset")
+
+        class Response:
+            data = [row for row in self.table.rows if row["status"] == "active"]
+        return Response()
+
+
+class FakeTenders:
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+        self.fail_updates = False
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _tender(tender_id, deadline):
+    return {
+        "id": tender_id, "company_id": "c1", "bid_number": f"GEM/2026/B/{tender_id}",
+        "nickname": None, "bid_end_date": scheduler._iso(deadline), "status": "active",
+    }
+
+
+@pytest.fixture
+def clock():
+    return [1_000_000.0]
+
+
+def _deadlines(client, clock):
+    return scheduler.DeadlineScheduler(client, reminder_lead_hours=1, clock=lambda: clock[0])
+
+
+def test_schedule_is_ignored_until_load(clock):
+    deadlines = _deadlines(FakeTenders([]), clock)
+    deadlines.schedule(_tender(1, clock[0] + 60))
+    assert len(deadlines) == 0 and deadlines.next_due() is None
+
+
+def test_retimed_tender_expires_at_its_new_deadline(clock):
+    client = FakeTenders([_tender(1, clock[0] + 60)])
+    deadlines = _deadlines(client, clock)
+    asyncio.run(deadlines.load())
+    deadlines.schedule(_tender(1, clock[0] + 600))
+
+    expired, _ = deadlines.pop_due(clock[0] + 60)
+    assert expired == []
+    expired, _ = deadlines.pop_due(clock[0] + 600)
+    assert [tender["id"] for tender in expired] == [1]
+    assert len(deadlines) == 0
+
+
+def test_reminders_lead_the_deadline_and_late_ones_skip_the_load(clock):
+    client = FakeTenders([_tender(1, clock[0] + 1800)])
+    deadlines = _deadlines(client, clock)
+    asyncio.run(deadlines.load())
+    # Already inside the reminder window at startup: not replayed
+    assert deadlines.pop_due() == ([], [])
+
+    # Inside the window when scheduled later: reminded right away, then expired
+    deadlines.schedule(_tender(2, clock[0] + 1800))
+    _, reminders = deadlines.pop_due()
+    assert [tender["id"] for tender in reminders] == [2]
+    deadlines.schedule(_tender(3, clock[0] + 7200))
+    _, reminders = deadlines.pop_due(clock[0] + 3600)
+    assert [tender["id"] for tender in reminders] == [3]
+
+
+def test_failed_expire_is_retried_across_polls(clock):
+    client = FakeTenders([_tender(1, clock[0] + 60)])
+    deadlines = _deadlines(client, clock)
+    asyncio.run(deadlines.load())
+
+    clock[0] += 120
+    client.fail_updates = True
+    assert asyncio.run(deadlines.process_due()) == (1, 0)
+    assert len(deadlines) == 1
+
+    # The row is still active, so the poll sees it again; the retry stays queued
+    polled_at = deadlines._polled_at
+    asyncio.run(deadlines.poll())
+    assert deadlines._polled_at > polled_at
+    assert deadlines.next_due() == clock[0] + 30
+
+    clock[0] += 30
+    client.fail_updates = False
+    assert asyncio.run(deadlines.process_due()) == (1, 0)
+    assert client.updates == [{"status": "expired"}] * 2
+    assert len(deadlines) == 0
@@ -1,6 +1,7 @@
 import os
 import shutil
 import subprocess
+import sys
 
 def build_deploy():
     # Paths
@@ -29,6 +30,11 @@ def build_deploy():
 
     print(f"Copying {FRONTEND_OUT} to {STATIC_DIR}...")
     shutil.copytree(FRONTEND_OUT, STATIC_DIR)
+
+    # Precompressed .gz/.br variants, served by app/static_files.py
+    sys.path.insert(0, BACKEND_DIR)
+    from app import static_files
+    print(f"Precompressed {static_files.precompress(STATIC_DIR)} static variants")
     
     print("Deployment preparation complete!")
     print("Run 'python run_backend.py' in backend/ directory to test.")
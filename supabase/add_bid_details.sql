@@ -0,0 +1,27 @@
+-- ============================================
+-- GEMtracker: Bid Data Sheet Columns
+-- ============================================
+-- Run this once in the Supabase SQL Editor on a database
+-- created from schema.sql / schema_v2.sql before these
+-- columns existed. Safe to re-run.
+-- ============================================
+
+ALTER TABLE tenders
+    ADD COLUMN IF NOT EXISTS bid_opening_date TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS ministry VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS department VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS buyer_organisation VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS quantity INTEGER,
+    ADD COLUMN IF NOT EXISTS emd_amount NUMERIC(15, 2),
+    ADD COLUMN IF NOT EXISTS epbg_percentage NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS estimated_value NUMERIC(15, 2),
+    ADD COLUMN IF NOT EXISTS contract_period VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS consignee_locations TEXT[];
+
+-- Dashboards always filter by company first (RLS), so lead with company_id
+CREATE INDEX IF NOT EXISTS idx_tenders_company_ministry ON tenders(company_id, ministry);
+CREATE INDEX IF NOT EXISTS idx_tenders_company_department ON tenders(company_id, department);
+CREATE INDEX IF NOT EXISTS idx_tenders_company_buyer_organisation ON tenders(company_id, buyer_organisation);
+CREATE INDEX IF NOT EXISTS idx_tenders_company_emd_amount ON tenders(company_id, emd_amount);
+CREATE INDEX IF NOT EXISTS idx_tenders_company_estimated_value ON tenders(company_id, estimated_value);
+CREATE INDEX IF NOT EXISTS idx_tenders_consignee_locations ON tenders USING GIN (consignee_locations);
@@ -0,0 +1,42 @@
+-- ============================================
+-- GEMtracker: Batch Checklist Updates
+-- ============================================
+-- Run this in the Supabase SQL Editor after schema.sql /
+-- schema_v2.sql. Safe to re-run.
+--
+-- PATCH /api/tenders/{id}/checklist applies a list of item
+-- updates in one call: the tender's company is checked once
+-- and every item is updated by a single UPDATE statement.
+-- ============================================
+
+-- p_items: [{"id": "<item uuid>", "is_ready": true, "notes": "..."}, ...]
+-- Only the keys present in an element are changed. Raises (and changes
+-- nothing) when the tender is not the company's or an id is not one of
+-- the tender's checklist items.
+CREATE OR REPLACE FUNCTION update_checklist_items(p_tender_id UUID, p_company_id UUID, p_user_id UUID, p_items JSONB)
+RETURNS SETOF checklist_items AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    PERFORM 1 FROM tenders WHERE id = p_tender_id AND company_id = p_company_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Tender not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    RETURN QUERY
+    UPDATE checklist_items ci SET
+        is_ready = CASE WHEN u.value ? 'is_ready' THEN (u.value->>'is_ready')::BOOLEAN ELSE ci.is_ready END,
+        is_submitted = CASE WHEN u.value ? 'is_submitted' THEN (u.value->>'is_submitted')::BOOLEAN ELSE ci.is_submitted END,
+        document_url = CASE WHEN u.value ? 'document_url' THEN u.value->>'document_url' ELSE ci.document_url END,
+        notes = CASE WHEN u.value ? 'notes' THEN u.value->>'notes' ELSE ci.notes END,
+        updated_by = p_user_id
+    FROM jsonb_array_elements(p_items) AS u(value)
+    WHERE ci.id = (u.value->>'id')::UUID AND ci.tender_id = p_tender_id
+    RETURNING ci.*;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    IF updated_count <> jsonb_array_length(p_items) THEN
+        RAISE EXCEPTION 'Checklist item not found' USING ERRCODE = 'P0002';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
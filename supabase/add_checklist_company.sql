@@ -0,0 +1,55 @@
+-- ============================================
+-- GEMtracker: Company-Scoped Checklist Items
+-- ============================================
+-- Run this in the Supabase SQL Editor after schema.sql /
+-- schema_v2.sql. Safe to re-run.
+--
+-- Copies each item's tender company onto checklist_items, so
+-- the checklist endpoints authorize and update an item with
+-- one filtered query (id + company_id) instead of looking up
+-- its tender first, and RLS no longer joins through tenders.
+-- ============================================
+
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS company_id UUID REFERENCES companies(id) ON DELETE CASCADE;
+
+-- Always taken from the tender, never from the client
+CREATE OR REPLACE FUNCTION set_checklist_item_company() RETURNS TRIGGER AS $$
+BEGIN
+    SELECT company_id INTO NEW.company_id FROM tenders WHERE id = NEW.tender_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_checklist_item_company ON checklist_items;
+CREATE TRIGGER set_checklist_item_company BEFORE INSERT OR UPDATE OF tender_id, company_id ON checklist_items FOR EACH ROW EXECUTE FUNCTION set_checklist_item_company();
+
+-- Keeps items in step if a tender ever moves to another company
+CREATE OR REPLACE FUNCTION sync_checklist_item_company() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE checklist_items SET company_id = NEW.company_id WHERE tender_id = NEW.id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_checklist_item_company ON tenders;
+CREATE TRIGGER sync_checklist_item_company AFTER UPDATE OF company_id ON tenders FOR EACH ROW WHEN (OLD.company_id IS DISTINCT FROM NEW.company_id) EXECUTE FUNCTION sync_checklist_item_company();
+
+-- Backfill existing items (the trigger fills new ones)
+UPDATE checklist_items ci SET company_id = t.company_id
+FROM tenders t
+WHERE t.id = ci.tender_id AND ci.company_id IS DISTINCT FROM t.company_id;
+
+ALTER TABLE checklist_items ALTER COLUMN company_id SET NOT NULL;
+
+-- Delta sync (GET /api/tenders/?since=) reads a company's recently
+-- changed items straight from this index (sync_version comes from
+-- add_tender_sync.sql)
+CREATE INDEX IF NOT EXISTS idx_checklist_company_sync_version ON checklist_items(company_id, sync_version);
+
+-- RLS: compare the item's own company instead of a subquery over tenders
+DROP POLICY IF EXISTS "Users can view company checklist items" ON checklist_items;
+DROP POLICY IF EXISTS "Users can create checklist items" ON checklist_items;
+DROP POLICY IF EXISTS "Users can update checklist items" ON checklist_items;
+CREATE POLICY "Users can view company checklist items" ON checklist_items FOR SELECT USING (company_id IN (SELECT company_id FROM users WHERE id = auth.uid()));
+CREATE POLICY "Users can create checklist items" ON checklist_items FOR INSERT WITH CHECK (company_id IN (SELECT company_id FROM users WHERE id = auth.uid()));
+CREATE POLICY "Users can update checklist items" ON checklist_items FOR UPDATE USING (company_id IN (SELECT company_id FROM users WHERE id = auth.uid()));
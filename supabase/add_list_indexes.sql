@@ -0,0 +1,16 @@
+-- ============================================
+-- GEMtracker: Tender List Indexes
+-- ============================================
+-- Run this once in the Supabase SQL Editor on a database
+-- created from schema.sql / schema_v2.sql before these
+-- indexes existed. Safe to re-run.
+-- ============================================
+
+-- GET /api/tenders/ filters by company (RLS) and orders by deadline;
+-- status filters (e.g. active only) narrow the same range
+CREATE INDEX IF NOT EXISTS idx_tenders_company_status_end_date ON tenders(company_id, status, bid_end_date);
+CREATE INDEX IF NOT EXISTS idx_tenders_company_end_date ON tenders(company_id, bid_end_date);
+
+-- The deadline scheduler (app/scheduler.py) polls every few seconds for
+-- tenders written since its last poll
+CREATE INDEX IF NOT EXISTS idx_tenders_updated_at ON tenders(updated_at);
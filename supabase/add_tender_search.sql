@@ -0,0 +1,100 @@
+-- ============================================
+-- GEMtracker: Full-Text Tender Search
+-- ============================================
+-- Run this in the Supabase SQL Editor after schema.sql /
+-- schema_v2.sql and add_bid_details.sql. Safe to re-run.
+--
+-- tender_search holds one row per tender: the PDF page text
+-- (written by a tender_index background job after upload)
+-- and a weighted tsvector over the tender's fields and that
+-- text. It lives outside tenders so "select *" on tenders
+-- never drags the page text along.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS tender_search (
+    tender_id UUID PRIMARY KEY REFERENCES tenders(id) ON DELETE CASCADE,
+    company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    content TEXT, -- PDF page text
+    search_vector TSVECTOR,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_tender_search_vector ON tender_search USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_tender_search_company_id ON tender_search(company_id);
+
+ALTER TABLE tender_search ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Users can search company tenders" ON tender_search;
+CREATE POLICY "Users can search company tenders" ON tender_search FOR SELECT USING (company_id IN (SELECT company_id FROM users WHERE id = auth.uid()));
+
+-- A: bid number, nickname, subject  B: item category  C: buyer  D: PDF text
+CREATE OR REPLACE FUNCTION tender_search_vector(t tenders, page_text TEXT) RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(t.bid_number, '')), 'A')
+        || setweight(to_tsvector('english', concat_ws(' ', t.nickname, t.subject)), 'A')
+        || setweight(to_tsvector('english', coalesce(t.item_category, '')), 'B')
+        || setweight(to_tsvector('english', concat_ws(' ', t.ministry, t.department, t.buyer_organisation)), 'C')
+        -- tsvector values are capped at 1MB
+        || setweight(to_tsvector('english', left(coalesce(page_text, ''), 500000)), 'D')
+$$ LANGUAGE sql STABLE;
+
+-- Recompute the vector whenever the page text is written
+CREATE OR REPLACE FUNCTION refresh_tender_search_vector() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := tender_search_vector((SELECT t FROM tenders t WHERE t.id = NEW.tender_id), NEW.content);
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS refresh_tender_search_vector ON tender_search;
+CREATE TRIGGER refresh_tender_search_vector BEFORE INSERT OR UPDATE OF content ON tender_search FOR EACH ROW EXECUTE FUNCTION refresh_tender_search_vector();
+
+-- Every tender gets a search row on insert, and its vector follows field edits
+CREATE OR REPLACE FUNCTION sync_tender_search() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO tender_search (tender_id, company_id) VALUES (NEW.id, NEW.company_id) ON CONFLICT (tender_id) DO NOTHING;
+    ELSE
+        UPDATE tender_search SET search_vector = tender_search_vector(NEW, content), updated_at = NOW() WHERE tender_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_tender_search_insert ON tenders;
+CREATE TRIGGER sync_tender_search_insert AFTER INSERT ON tenders FOR EACH ROW EXECUTE FUNCTION sync_tender_search();
+DROP TRIGGER IF EXISTS sync_tender_search_update ON tenders;
+CREATE TRIGGER sync_tender_search_update AFTER UPDATE OF bid_number, nickname, subject, item_category, ministry, department, buyer_organisation ON tenders FOR EACH ROW EXECUTE FUNCTION sync_tender_search();
+
+-- Existing tenders become searchable by their fields
+INSERT INTO tender_search (tender_id, company_id) SELECT id, company_id FROM tenders ON CONFLICT (tender_id) DO NOTHING;
+
+-- Ranked, highlighted search within one company; only the returned page is highlighted
+CREATE OR REPLACE FUNCTION search_tenders(p_company_id UUID, p_query TEXT, p_limit INTEGER DEFAULT 20, p_offset INTEGER DEFAULT 0)
+RETURNS TABLE (
+    id UUID,
+    bid_number VARCHAR,
+    subject VARCHAR,
+    nickname VARCHAR,
+    bid_end_date TIMESTAMP WITH TIME ZONE,
+    status VARCHAR,
+    rank REAL,
+    subject_highlight TEXT,
+    snippet TEXT
+) AS $$
+    WITH query AS (
+        -- english for words, simple so bid numbers like GEM/2026/B/123 match verbatim
+        SELECT websearch_to_tsquery('english', p_query) || websearch_to_tsquery('simple', p_query) AS q
+    ),
+    hits AS (
+        SELECT s.tender_id, s.content, ts_rank_cd(s.search_vector, query.q, 1) AS rank
+        FROM tender_search s, query
+        WHERE s.company_id = p_company_id AND s.search_vector @@ query.q
+        ORDER BY rank DESC, s.tender_id
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT t.id, t.bid_number, t.subject, t.nickname, t.bid_end_date, t.status, hits.rank,
+           ts_headline('english', coalesce(t.subject, ''), query.q, 'StartSel=<mark>, StopSel=</mark>, HighlightAll=true'),
+           ts_headline('english', coalesce(hits.content, ''), query.q, 'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2')
+    FROM hits JOIN tenders t ON t.id = hits.tender_id, query
+    ORDER BY hits.rank DESC, t.id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,111 @@
+-- ============================================
+-- GEMtracker: Incremental Tender Sync
+-- ============================================
+-- Run this in the Supabase SQL Editor after schema.sql /
+-- schema_v2.sql. Safe to re-run.
+--
+-- GET /api/tenders/?since=<cursor> returns only the tenders
+-- and checklist items written after the cursor, plus
+-- tombstones for rows deleted since then.
+--
+-- Every write stamps its row with the company's next sync
+-- version. The counter row stays locked until the writing
+-- transaction commits, so versions become visible in commit
+-- order: a slow transaction that commits late still gets a
+-- version above any cursor handed out before its commit
+-- (updated_at, the transaction start time, does not).
+-- ============================================
+
+-- Tombstones for deleted rows, kept for 30 days
+CREATE TABLE IF NOT EXISTS deleted_records (
+    id BIGSERIAL PRIMARY KEY,
+    company_id UUID NOT NULL,
+    table_name VARCHAR(50) NOT NULL, -- 'tenders' or 'checklist_items'
+    record_id UUID NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_records_company_deleted_at ON deleted_records(company_id, deleted_at);
+
+-- One counter per company; version 0 = nothing written since this script ran
+CREATE TABLE IF NOT EXISTS tender_sync_versions (
+    company_id UUID PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+ALTER TABLE tender_sync_versions ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE tenders ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE checklist_items ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE deleted_records ADD COLUMN IF NOT EXISTS sync_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_tenders_company_sync_version ON tenders(company_id, sync_version);
+CREATE INDEX IF NOT EXISTS idx_deleted_records_company_sync_version ON deleted_records(company_id, sync_version);
+
+-- Bumps and returns the company's version, holding its row lock until commit.
+-- SECURITY DEFINER so writes made under RLS can still move the counter.
+CREATE OR REPLACE FUNCTION next_sync_version(p_company_id UUID) RETURNS BIGINT AS $$
+    INSERT INTO tender_sync_versions AS v (company_id, version, changed_at) VALUES (p_company_id, 1, clock_timestamp())
+    ON CONFLICT (company_id) DO UPDATE SET version = v.version + 1, changed_at = clock_timestamp()
+    RETURNING version
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION stamp_sync_version() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.sync_version := next_sync_version(NEW.company_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stamp_checklist_item_sync_version() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.sync_version := next_sync_version((SELECT company_id FROM tenders WHERE id = NEW.tender_id));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stamp_sync_version ON tenders;
+CREATE TRIGGER stamp_sync_version BEFORE INSERT OR UPDATE ON tenders FOR EACH ROW EXECUTE FUNCTION stamp_sync_version();
+DROP TRIGGER IF EXISTS stamp_sync_version ON checklist_items;
+CREATE TRIGGER stamp_sync_version BEFORE INSERT OR UPDATE ON checklist_items FOR EACH ROW EXECUTE FUNCTION stamp_checklist_item_sync_version();
+DROP TRIGGER IF EXISTS stamp_sync_version ON deleted_records;
+CREATE TRIGGER stamp_sync_version BEFORE INSERT ON deleted_records FOR EACH ROW EXECUTE FUNCTION stamp_sync_version();
+
+ALTER TABLE deleted_records ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Users can view company tombstones" ON deleted_records;
+CREATE POLICY "Users can view company tombstones" ON deleted_records FOR SELECT USING (company_id IN (SELECT company_id FROM users WHERE id = auth.uid()));
+
+CREATE OR REPLACE FUNCTION record_tender_delete() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO deleted_records (company_id, table_name, record_id) VALUES (OLD.company_id, 'tenders', OLD.id);
+    -- Expire old tombstones as new ones arrive (index range scan, usually empty)
+    DELETE FROM deleted_records WHERE deleted_at < NOW() - INTERVAL '30 days';
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Items removed together with their tender need no tombstone of their own:
+-- by the time this runs the tender row is gone, so the SELECT inserts nothing
+CREATE OR REPLACE FUNCTION record_checklist_item_delete() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO deleted_records (company_id, table_name, record_id)
+    SELECT t.company_id, 'checklist_items', OLD.id FROM tenders t WHERE t.id = OLD.tender_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_tender_delete ON tenders;
+CREATE TRIGGER record_tender_delete AFTER DELETE ON tenders FOR EACH ROW EXECUTE FUNCTION record_tender_delete();
+DROP TRIGGER IF EXISTS record_checklist_item_delete ON checklist_items;
+CREATE TRIGGER record_checklist_item_delete AFTER DELETE ON checklist_items FOR EACH ROW EXECUTE FUNCTION record_checklist_item_delete();
+
+-- The company's current version and when it last moved, as
+-- '<version>@<epoch seconds>'. The API uses it as the ETag and as
+-- the next ?since= cursor.
+DROP FUNCTION IF EXISTS tender_sync_version(UUID);
+CREATE OR REPLACE FUNCTION tender_sync_version(p_company_id UUID) RETURNS TEXT AS $$
+    SELECT COALESCE(
+        (SELECT version || '@' || extract(epoch FROM changed_at) FROM tender_sync_versions WHERE company_id = p_company_id),
+        '0'
+    )
+$$ LANGUAGE sql STABLE;
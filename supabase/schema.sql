@@ -43,6 +43,18 @@ CREATE TABLE tenders (
     bid_end_date TIMESTAMP WITH TIME ZONE,
     item_category TEXT,
     subject VARCHAR(500), -- 10-word summary
+
+    -- Bid Data Sheet (extracted once at ingestion)
+    bid_opening_date TIMESTAMP WITH TIME ZONE,
+    ministry VARCHAR(255),
+    department VARCHAR(255),
+    buyer_organisation VARCHAR(255),
+    quantity INTEGER,
+    emd_amount NUMERIC(15, 2),
+    epbg_percentage NUMERIC(5, 2),
+    estimated_value NUMERIC(15, 2),
+    contract_period VARCHAR(100),
+    consignee_locations TEXT[],
     
     -- Custom Fields
     nickname VARCHAR(255),
@@ -59,6 +71,14 @@ CREATE TABLE tenders (
 CREATE INDEX idx_tenders_company_id ON tenders(company_id);
 CREATE INDEX idx_tenders_status ON tenders(status);
 CREATE INDEX idx_tenders_bid_end_date ON tenders(bid_end_date);
+CREATE INDEX idx_tenders_company_status_end_date ON tenders(company_id, status, bid_end_date);
+CREATE INDEX idx_tenders_company_end_date ON tenders(company_id, bid_end_date);
+CREATE INDEX idx_tenders_company_ministry ON tenders(company_id, ministry);
+CREATE INDEX idx_tenders_company_department ON tenders(company_id, department);
+CREATE INDEX idx_tenders_company_buyer_organisation ON tenders(company_id, buyer_organisation);
+CREATE INDEX idx_tenders_company_emd_amount ON tenders(company_id, emd_amount);
+CREATE INDEX idx_tenders_company_estimated_value ON tenders(company_id, estimated_value);
+CREATE INDEX idx_tenders_consignee_locations ON tenders USING GIN (consignee_locations);
 
 -- ============================================
 -- 4. CHECKLIST_ITEMS TABLE